@@ -2,6 +2,7 @@ from fasthtml.common import *
 import json
 import random
 from datetime import datetime, timedelta
+from reference_data import get_reference_data
 
 # Configuração básica sem CDNs externos
 app, rt = fast_app()
@@ -479,42 +480,11 @@ def create_stats_cards():
     </div>
     """
 
-# Dados de municípios por UF (amostra)
-MUNICIPIOS_POR_UF = {
-    'AC': ['RIO BRANCO', 'CRUZEIRO DO SUL', 'SENA MADUREIRA', 'TARAUACA'],
-    'AL': ['MACEIO', 'ARAPIRACA', 'PALMEIRA DOS INDIOS', 'RIO LARGO'],
-    'AP': ['MACAPA', 'SANTANA', 'LARANJAL DO JARI', 'OIAPOQUE'],
-    'AM': ['MANAUS', 'PARINTINS', 'ITACOATIARA', 'MANACAPURU'],
-    'BA': ['SALVADOR', 'FEIRA DE SANTANA', 'VITORIA DA CONQUISTA', 'CAMAÇARI'],
-    'CE': ['FORTALEZA', 'CAUCAIA', 'JUAZEIRO DO NORTE', 'MARACANAÚ'],
-    'DF': ['BRASILIA', 'GAMA', 'TAGUATINGA', 'CEILANDIA'],
-    'ES': ['VITORIA', 'VILA VELHA', 'SERRA', 'CARIACICA'],
-    'GO': ['GOIANIA', 'APARECIDA DE GOIANIA', 'ANAPOLIS', 'RIO VERDE'],
-    'MA': ['SAO LUIS', 'IMPERATRIZ', 'SAO JOSE DE RIBAMAR', 'TIMON'],
-    'MT': ['CUIABA', 'VARZEA GRANDE', 'RONDONOPOLIS', 'SINOP'],
-    'MS': ['CAMPO GRANDE', 'DOURADOS', 'TRES LAGOAS', 'CORUMBA'],
-    'MG': ['BELO HORIZONTE', 'UBERLANDIA', 'CONTAGEM', 'JUIZ DE FORA'],
-    'PA': ['BELEM', 'ANANINDEUA', 'SANTAREM', 'MARABA'],
-    'PB': ['JOAO PESSOA', 'CAMPINA GRANDE', 'SANTA RITA', 'PATOS'],
-    'PR': ['CURITIBA', 'LONDRINA', 'MARINGA', 'PONTA GROSSA'],
-    'PE': ['RECIFE', 'JABOATAO DOS GUARARAPES', 'OLINDA', 'CARUARU'],
-    'PI': ['TERESINA', 'PARNAIBA', 'PICOS', 'PIRIPIRI'],
-    'RJ': ['RIO DE JANEIRO', 'SAO GONCALO', 'DUQUE DE CAXIAS', 'NOVA IGUACU'],
-    'RN': ['NATAL', 'MOSSORO', 'PARNAMIRIM', 'SAO GONCALO DO AMARANTE'],
-    'RS': ['PORTO ALEGRE', 'CAXIAS DO SUL', 'PELOTAS', 'CANOAS'],
-    'RO': ['PORTO VELHO', 'JI-PARANA', 'ARIQUEMES', 'VILHENA'],
-    'RR': ['BOA VISTA', 'RORAINOPOLIS', 'CARACARAI', 'ALTO ALEGRE'],
-    'SC': ['FLORIANOPOLIS', 'JOINVILLE', 'BLUMENAU', 'SAO JOSE'],
-    'SP': ['SAO PAULO', 'GUARULHOS', 'CAMPINAS', 'SAO BERNARDO DO CAMPO'],
-    'SE': ['ARACAJU', 'NOSSA SENHORA DO SOCORRO', 'LAGARTO', 'ITABAIANA'],
-    'TO': ['PALMAS', 'ARAGUAINA', 'GURUPI', 'PORTO NACIONAL']
-}
-
 # API para retornar municípios por UF
 @rt("/api/municipios/{uf}")
 def get_municipios(uf: str):
-    municipios = MUNICIPIOS_POR_UF.get(uf.upper(), [])
-    return {"municipios": municipios}
+    municipios = get_reference_data().municipios_por_uf.get(uf.upper(), ())
+    return {"municipios": list(municipios)}
 
 # Rota principal - Dashboard
 @rt("/")
@@ -703,8 +673,9 @@ def get():
 # Rota de predição
 @rt("/prediction")
 def get():
-    uf_options = ['AC', 'AL', 'AP', 'AM', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MT', 'MS', 'MG', 'PA', 'PB', 'PR', 'PE', 'PI', 'RJ', 'RN', 'RS', 'RO', 'RR', 'SC', 'SP', 'SE', 'TO']
-    condicoes = ['Ceu Claro', 'Chuva', 'Garoa/Chuvisco', 'Granizo', 'Nevoeiro/Neblina', 'Nublado', 'Sol', 'Vento']
+    reference = get_reference_data()
+    uf_options = reference.uf_options
+    condicoes = reference.condicoes
     
     return Html(
         Head(
@@ -0,0 +1,465 @@
+"""Benchmarks de desempenho do pipeline do SafeWay.
+
+Uso:
+    python benchmarks.py [nome ...]
+"""
+import os
+import sys
+import pickle
+import subprocess
+import time
+import tempfile
+import json
+import numpy as np
+import pandas as pd
+from preditor_ofc import AccidentPredictor
+from dados_sinteticos import dados_brutos, consultas
+
+
+def preditor_treinado(n=30_000, **kwargs):
+    """AccidentPredictor treinado em `n` linhas sintéticas"""
+    predictor = AccidentPredictor(**kwargs)
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo = os.path.join(tmp, "datatran.ndjson")
+        dados_brutos(n).to_json(arquivo, orient="records", lines=True, force_ascii=False)
+        predictor.treinar(arquivo, cache=None)
+    return predictor
+
+
+def _cronometrar(func, *args):
+    inicio = time.perf_counter()
+    resultado = func(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def bench_moda(tamanhos=(100_000, 1_000_000, 5_000_000)):
+    """Compara a moda diária com lambdas `mode()` e a versão vetorizada"""
+    predictor = AccidentPredictor()
+    colunas = ["uf", "municipio", "tipo_acidente", "condicao_metereologica"]
+
+    def moda_lambda(df):
+        return df.groupby("data").agg(**{c: (c, lambda x: x.mode()[0]) for c in colunas})
+
+    def moda_vetorizada(df):
+        return pd.DataFrame({c: predictor._moda_por_dia(df, c) for c in colunas})
+
+    for n in tamanhos:
+        df = dados_brutos(n)
+        df["data"] = pd.to_datetime(df["data_inversa"], format="%d/%m/%Y")
+        antigo, t_antigo = _cronometrar(moda_lambda, df)
+        novo, t_novo = _cronometrar(moda_vetorizada, df)
+        assert antigo.equals(novo), "Moda vetorizada divergiu de mode()[0]"
+        print(f"{n:>10,} linhas | mode(): {t_antigo:7.2f}s | vetorizada: {t_novo:7.2f}s | {t_antigo / t_novo:5.1f}x")
+
+
+def bench_prever_rapido(n=300):
+    """Latência de prever_rapido contra prever com DataFrame de uma linha (paridade em tests/)"""
+    for feriados_estaduais, granularidade in ((False, "dia"), (True, "dia"), (False, "uf"), (False, "municipio")):
+        predictor = preditor_treinado(feriados_estaduais=feriados_estaduais, granularidade=granularidade)
+        t_df = t_rapido = 0.0
+        for data, hora, uf, municipio, condicao, tipo in consultas(n):
+            linha = pd.DataFrame({
+                "data_inversa": [data.strftime("%d/%m/%Y")],
+                "horario": [f"{hora:02d}:00:00"],
+                "uf": [uf],
+                "municipio": [municipio],
+                "tipo_acidente": [tipo],
+                "condicao_metereologica": [condicao],
+            })
+            _, t = _cronometrar(predictor.prever, linha)
+            t_df += t
+            _, t = _cronometrar(predictor.prever_rapido, data, hora, uf, municipio, condicao, tipo)
+            t_rapido += t
+        print(f"feriados_estaduais={feriados_estaduais} granularidade={granularidade} | {n} consultas | "
+              f"prever: {t_df / n * 1e3:.2f}ms | prever_rapido: {t_rapido / n * 1e3:.3f}ms")
+
+
+def bench_prever_lote(dias=7):
+    """Paridade de prever_lote com prever_rapido e vazão na grade dias × horas × municípios"""
+    amostra = list(consultas(500))
+    colunas = list(zip(*amostra))
+    for granularidade in ("uf", "dia"):
+        predictor = preditor_treinado(granularidade=granularidade)
+        lote = predictor.prever_lote(*colunas, tamanho_bloco=128)
+        esperado = [predictor.prever_rapido(*consulta) for consulta in amostra]
+        assert np.array_equal(lote, np.asarray(esperado, dtype=np.float32)), "prever_lote divergiu de prever_rapido"
+        print(f"granularidade={granularidade} | {len(amostra)} consultas idênticas a prever_rapido")
+
+    with open("municipios_por_uf.json", "r", encoding="utf-8") as f:
+        municipios_por_uf = json.load(f)
+    locais = pd.DataFrame(
+        [(uf, municipio) for uf, municipios in municipios_por_uf.items() for municipio in municipios],
+        columns=["uf", "municipio"]
+    )
+    grade = locais.merge(
+        pd.DataFrame({"data": pd.date_range("2025-01-01", periods=dias, freq="D")}), how="cross"
+    ).merge(pd.DataFrame({"hora": range(24)}), how="cross")
+    grade["condicao"] = "Chuva"
+
+    previsoes, t = _cronometrar(
+        predictor.prever_lote, grade["data"], grade["hora"], grade["uf"], grade["municipio"], grade["condicao"]
+    )
+    print(f"{len(grade):,} linhas em {t:.2f}s | {len(grade) / t:,.0f} linhas/s | {previsoes.nbytes / 1e6:.1f} MB de saída")
+
+
+_MEDIR_CARGA = """
+import os, time
+from preditor_ofc import AccidentPredictor
+import pickle
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+antes = rss()
+inicio = time.perf_counter()
+modelo = {carga}
+print(time.perf_counter() - inicio, rss() - antes)
+"""
+
+
+def bench_artefato(n=200_000):
+    """Tempo de carga a frio e memória residente: pickle x formato nativo"""
+    predictor = preditor_treinado(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho_pickle = os.path.join(tmp, "modelo_acidentes.pkl")
+        with open(caminho_pickle, "wb") as f:
+            pickle.dump(predictor, f)
+        predictor.exportar_modelo(os.path.join(tmp, "modelo_acidentes"))
+
+        nativo = AccidentPredictor.carregar_modelo(os.path.join(tmp, "modelo_acidentes"))
+        amostra = list(consultas(200))
+        assert [nativo.prever_rapido(*c) for c in amostra] == [predictor.prever_rapido(*c) for c in amostra]
+
+        cargas = {
+            "pickle": f"pickle.load(open({caminho_pickle!r}, 'rb'))",
+            "nativo": f"AccidentPredictor.carregar_modelo({os.path.join(tmp, 'modelo_acidentes')!r})",
+        }
+        for nome, carga in cargas.items():
+            saida = subprocess.run(
+                [sys.executable, "-c", _MEDIR_CARGA.format(carga=carga)],
+                capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+            ).stdout.split()
+            tamanho = sum(os.path.getsize(os.path.join(tmp, a)) for a in os.listdir(tmp) if
+                          (a.endswith(".pkl") if nome == "pickle" else not a.endswith(".pkl")))
+            print(f"{nome:>7} | {tamanho / 1e3:8.1f} KB | carga: {float(saida[0]) * 1e3:7.1f}ms | "
+                  f"RSS: +{int(saida[1]) / 1e6:.1f} MB")
+
+
+def bench_arvores(repeticoes=20):
+    """Latência da floresta achatada (tree_inference) contra o booster (paridade em tests/)"""
+    from tree_inference import FlatForest
+
+    predictor = preditor_treinado()
+    booster = predictor._booster()
+    floresta = FlatForest.from_booster(booster)
+    amostra = list(consultas(10_000))
+    X = predictor._matriz_lote(*(np.asarray(c, dtype=object) for c in zip(*amostra)))
+    X[::97, 10] = np.nan  # hora_media ausente em algumas linhas, para exercitar os valores ausentes
+
+    for n in (1, 100, 10_000):
+        lote = X[:n]
+        tempos = {}
+        for nome, func in (("booster", booster.predict), ("floresta", floresta.predict)):
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                func(lote)
+            tempos[nome] = (time.perf_counter() - inicio) / repeticoes
+        print(f"lote {n:>6,} | booster: {tempos['booster'] * 1e3:8.3f}ms | "
+              f"floresta: {tempos['floresta'] * 1e3:8.3f}ms")
+
+
+def bench_historico(n=30_000, consultas_online=10_000):
+    """Custo por consulta das features do histórico (paridade com shift/rolling em tests/)"""
+    from feature_store import FeatureStore
+
+    df = AccidentPredictor()._processar_dados(dados_brutos(n))
+    historico = FeatureStore().adicionar(df["data"], df["acidentes"])
+
+    dias = np.asarray(df["data"], dtype="datetime64[D]")
+    amostra = dias[np.random.default_rng(1).integers(0, len(dias), consultas_online)]
+    _, t_historico = _cronometrar(historico.features, amostra)
+
+    def recalcular(dia):
+        serie = df.loc[df["data"] < dia, "acidentes"]
+        return serie.iloc[-28:].mean(), serie.iloc[-28:].std()
+
+    _, t_pandas = _cronometrar(lambda: [recalcular(d) for d in amostra[:200]])
+    print(f"{consultas_online:,} consultas | histórico: {t_historico / consultas_online * 1e6:.2f}us/consulta | "
+          f"varrendo o histórico: {t_pandas / 200 * 1e6:.0f}us/consulta")
+
+
+def bench_incremental(n=60_000, dias_novos=60):
+    """Treino incremental (init_model) contra o retreino completo nos mesmos dados"""
+    dados = dados_brutos(n)
+    datas = pd.to_datetime(dados["data_inversa"], format="%d/%m/%Y")
+    corte = datas.max() - pd.Timedelta(days=dias_novos)
+    with tempfile.TemporaryDirectory() as tmp:
+        base, completo = os.path.join(tmp, "base.ndjson"), os.path.join(tmp, "completo.ndjson")
+        dados[datas <= corte].to_json(base, orient="records", lines=True, force_ascii=False)
+        dados.to_json(completo, orient="records", lines=True, force_ascii=False)
+
+        incremental = AccidentPredictor()
+        incremental.treinar(base, cache=os.path.join(tmp, "cache"))
+        # Sem teste de drift, para medir sempre o caminho incremental
+        relatorio = incremental.treinar_incremental(completo, limiar_drift=np.inf, cache=os.path.join(tmp, "cache"),
+                                                    prefixo=os.path.join(tmp, "modelo_acidentes"))
+        assert os.path.exists(os.path.join(tmp, f"modelo_acidentes-v{relatorio['versao']}.txt"))
+        assert AccidentPredictor.carregar_modelo(os.path.join(tmp, "modelo_acidentes")).versao_modelo == relatorio["versao"]
+
+        # Sem cache: a entrada de `completo` foi gravada com os encoders do modelo incremental
+        inicio = time.perf_counter()
+        retreino = AccidentPredictor()
+        retreino.treinar(completo, cache=None)
+        t_completo = time.perf_counter() - inicio
+
+        df, X, y = retreino._carregar_features(completo, cache=None)
+        novos = (df["data"] > corte).to_numpy()
+        rmse_retreino = np.sqrt(np.mean((np.clip(np.round(retreino._prever_matriz(X[novos].to_numpy())), 0, None) - y[novos]) ** 2))
+
+    print(f"{relatorio['dias_novos']} dias novos | treino {relatorio['estrategia']}: {relatorio['tempo']:.2f}s, "
+          f"RMSE nos dias novos {relatorio['rmse_novos_antes']:.2f} → {relatorio['rmse_novos_depois']:.2f}, "
+          f"RMSE geral {relatorio['rmse']:.2f}")
+    print(f"retreino completo: {t_completo:.2f}s, RMSE nos dias novos {rmse_retreino:.2f}, "
+          f"RMSE geral {retreino.rmse_score:.2f} | {t_completo / relatorio['tempo']:.1f}x mais lento")
+
+
+def bench_shards(n=100_000):
+    """Modelos por UF: treino dos shards, carga sob demanda e memória pelo registro"""
+    from model_integration import ShardRegistry
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo = os.path.join(tmp, "datatran.ndjson")
+        dados_brutos(n).to_json(arquivo, orient="records", lines=True, force_ascii=False)
+
+        _, t_unico = _cronometrar(AccidentPredictor(granularidade="uf").treinar, arquivo, 1, "grade", 100_000, None)
+        diretorio = os.path.join(tmp, "modelos_uf")
+        indice, t_shards = _cronometrar(AccidentPredictor.treinar_por_uf, arquivo, diretorio, "uf", -1)
+        print(f"modelo único (dia, UF): {t_unico:.1f}s | {len(indice['shards'])} shards: {t_shards:.1f}s "
+              f"com n_jobs=-1 ({os.cpu_count()} CPU)")
+
+        registro = ShardRegistry(diretorio, max_loaded=3)
+        amostra = list(consultas(300))
+        for data, hora, uf, municipio, condicao, tipo in amostra:
+            registro.get(uf).prever_rapido(data, hora, uf, municipio, condicao, tipo)
+        uf = amostra[0][2]
+        esperado = AccidentPredictor.carregar_modelo(os.path.join(diretorio, f"modelo_{uf}"))
+        assert registro.get(uf).prever_rapido(*amostra[0]) == esperado.prever_rapido(*amostra[0])
+        print(f"{len(amostra)} consultas em {len(registro.available())} UFs | "
+              f"shards em memória: {registro.stats()['loaded']} (max_loaded=3)")
+
+
+_MEDIR_PIPELINE = """
+import sys
+sys.path.insert(0, {raiz!r})
+from preditor_ofc import AccidentPredictor
+
+predictor = AccidentPredictor(granularidade={granularidade!r})
+df, X, y = predictor._carregar_features({arquivo!r}, cache=None)
+with open("/proc/self/status") as f:
+    pico = next(int(linha.split()[1]) * 1024 for linha in f if linha.startswith("VmHWM"))
+print(pico, df.memory_usage(deep=True).sum(), X.memory_usage(deep=True).sum())
+"""
+
+
+def bench_memoria(n=2_000_000, granularidade="municipio", raiz=os.path.dirname(os.path.abspath(__file__))):
+    """Pico de RSS e memória dos frames do pipeline de treino em um histórico de `n` linhas (CSV)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo = os.path.join(tmp, "datatran.csv")
+        for inicio in range(0, n, 500_000):
+            dados_brutos(min(500_000, n - inicio), seed=inicio).to_csv(
+                arquivo, sep=";", encoding="latin-1", index=False, mode="a", header=inicio == 0
+            )
+        pico, dados, features = map(int, subprocess.run(
+            [sys.executable, "-c", _MEDIR_PIPELINE.format(raiz=raiz, granularidade=granularidade, arquivo=arquivo)],
+            capture_output=True, text=True, check=True
+        ).stdout.split())
+
+    # O mesmo conteúdo no layout sem o plano de tipos: textos object, inteiros int64 e floats float64
+    predictor = AccidentPredictor(granularidade=granularidade)
+    df = predictor._processar_dados(dados_brutos(200_000))
+    X, _ = predictor._criar_features(df.copy())
+    largo = X.astype({c: "float64" if X[c].dtype.kind == "f" else "int64" for c in X.columns})
+    df_largo = df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)} | {"acidentes": "int64"})
+    print(f"{n:,} linhas ({granularidade}) | pico de RSS: {pico / 1e6:.0f} MB | dados agregados: {dados / 1e6:.1f} MB | "
+          f"features: {features / 1e6:.1f} MB")
+    print(f"amostra de 200.000 linhas: features {largo.memory_usage(deep=True).sum() / X.memory_usage(deep=True).sum():.1f}x "
+          f"e dados agregados {df_largo.memory_usage(deep=True).sum() / df.memory_usage(deep=True).sum():.1f}x "
+          f"menores que com int64/float64/object")
+
+
+def bench_gerador(n=1_000_000):
+    """Tempo do gerador vetorizado de dados simulados e frequências contra os pesos"""
+    from data_generator import generate_accident_data, HOUR_WEIGHTS, ACCIDENT_WEIGHTS, WEATHER_WEIGHTS
+
+    df, t = _cronometrar(generate_accident_data, n, 42)
+    assert df.equals(generate_accident_data(n, seed=42)), "Mesma seed gerou dados diferentes"
+    desvios = {
+        "hora": (df["hora"].str.slice(0, 2).astype(int), HOUR_WEIGHTS),
+        "num_acidentes": (df["num_acidentes"] - 1, ACCIDENT_WEIGHTS),
+    }
+    for nome, (valores, pesos) in desvios.items():
+        esperado = np.asarray(pesos) / sum(pesos)
+        observado = np.bincount(valores, minlength=len(pesos)) / n
+        assert np.abs(observado - esperado).max() < 0.005, f"Distribuição de {nome} divergiu dos pesos"
+    clima = df["condicao_meteorologica"].value_counts(normalize=True)
+    assert abs(clima["Bom"] - WEATHER_WEIGHTS[0] / sum(WEATHER_WEIGHTS)) < 0.005
+    print(f"{n:,} linhas em {t:.2f}s | {n / t:,.0f} linhas/s | frequências dentro de 0,5 p.p. dos pesos")
+
+
+_MEDIR_ESCRITA = """
+import time
+from data_generator import write_datatran
+
+inicio = time.perf_counter()
+linhas = write_datatran({arquivo!r}, {n}, seed=42)
+with open("/proc/self/status") as f:
+    pico = next(int(linha.split()[1]) * 1024 for linha in f if linha.startswith("VmHWM"))
+print(linhas, time.perf_counter() - inicio, pico)
+"""
+
+
+def bench_streaming(tamanhos=(1_000_000, 5_000_000), formatos=("csv", "parquet")):
+    """Pico de RSS e vazão do gerador em blocos do DATATRAN: a memória não deve crescer com o total"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for formato in formatos:
+            for n in tamanhos:
+                arquivo = os.path.join(tmp, f"datatran.{formato}")
+                linhas, t, pico = subprocess.run(
+                    [sys.executable, "-c", _MEDIR_ESCRITA.format(arquivo=arquivo, n=n)],
+                    capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+                ).stdout.split()
+                print(f"{formato:>8} | {int(linhas):>10,} linhas em {float(t):6.1f}s | "
+                      f"{int(linhas) / float(t):>9,.0f} linhas/s | {os.path.getsize(arquivo) / 1e6:7.1f} MB | "
+                      f"pico de RSS: {int(pico) / 1e6:.0f} MB")
+                os.remove(arquivo)
+
+
+def bench_dashboard(renders=200):
+    """Custo dos dados de uma renderização do dashboard: quatro gerações contra o snapshot compartilhado"""
+    from data_generator import generate_accident_data, DashboardSnapshot
+
+    def antigo():
+        # Cada view gerava os próprios dados, como antes do snapshot
+        for n in (1000, 500, 300, 200):
+            generate_accident_data(n)
+
+    _, t_antigo = _cronometrar(antigo)
+
+    df = generate_accident_data(1000, seed=42)
+    snapshot = DashboardSnapshot(loader=lambda: df)
+    views, t_frio = _cronometrar(snapshot.views)
+    inicio = time.perf_counter()
+    for _ in range(renders):
+        snapshot.views()
+    t_quente = (time.perf_counter() - inicio) / renders
+    assert snapshot.refreshes == 1, "Snapshot foi refeito antes de expirar"
+
+    # Views conferidas contra groupby direto nos mesmos dados
+    hoje = pd.Timestamp.now().normalize()
+    recentes = df[pd.to_datetime(df["data"]) >= hoje - pd.Timedelta(days=30)]
+    por_dia = recentes.groupby("data")["num_acidentes"].sum()
+    diario = views["daily"].set_index("data")["num_acidentes"]
+    assert (diario[por_dia.index] == por_dia).all() and diario.sum() == por_dia.sum()
+    por_hora = df.groupby("hora")["num_acidentes"].sum()
+    horario = views["hourly"].set_index("hora")["num_acidentes"]
+    assert (horario[por_hora.index] == por_hora).all() and horario.sum() == df["num_acidentes"].sum()
+    assert sum(celula[2] for celula in views["heatmap"]) == df["num_acidentes"].sum()
+    print(f"4 gerações por render: {t_antigo * 1e3:.1f} ms | snapshot novo: {t_frio * 1e3:.1f} ms | "
+          f"snapshot pronto: {t_quente * 1e6:.1f} µs | views iguais ao groupby")
+
+
+def bench_referencia(repeticoes=200):
+    """Leitura dos JSON de referência a cada chamada contra o cache com recarga por mtime"""
+    import shutil
+    import reference_data
+    from reference_data import get_reference_data, UF_OPTIONS_FILE, MUNICIPIOS_FILE, CONDICOES_FILE
+
+    def ler_json():
+        for arquivo in (UF_OPTIONS_FILE, MUNICIPIOS_FILE, CONDICOES_FILE):
+            with open(os.path.join(reference_data.REFERENCE_DIR, arquivo), "r", encoding="utf-8") as f:
+                json.load(f)
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        ler_json()
+    t_json = (time.perf_counter() - inicio) / repeticoes
+    get_reference_data()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        referencia = get_reference_data()
+    t_cache = (time.perf_counter() - inicio) / repeticoes
+
+    assert referencia is get_reference_data(), "Cache releu arquivos que não mudaram"
+    assert all(referencia.locais[codigo] == local for local, codigo in referencia.local_codes.items())
+    with tempfile.TemporaryDirectory() as tmp:
+        for arquivo in (UF_OPTIONS_FILE, MUNICIPIOS_FILE, CONDICOES_FILE):
+            shutil.copy(os.path.join(reference_data.REFERENCE_DIR, arquivo), tmp)
+        antiga = get_reference_data(tmp)
+        with open(os.path.join(tmp, CONDICOES_FILE), "w", encoding="utf-8") as f:
+            json.dump(list(antiga.condicoes) + ["Fumaça"], f)
+        nova = get_reference_data(tmp)
+        assert nova is not antiga and nova.condicao_codes["Fumaça"] == len(antiga.condicoes), "Arquivo alterado não foi relido"
+    print(f"json.load por chamada: {t_json * 1e3:.2f} ms | cache: {t_cache * 1e6:.1f} µs | "
+          f"{len(referencia.locais):,} municípios | recarga após alteração OK")
+
+
+def bench_vistas(n=1_000_000, lotes=20, tamanho_lote=10_000):
+    """Agregados incrementais do dashboard contra groupby sobre todos os registros a cada leitura"""
+    from data_generator import generate_accident_data
+    from materialized_views import DashboardViews
+
+    def groupby(df):
+        hoje = pd.Timestamp.now().normalize()
+        datas = pd.to_datetime(df["data"])
+        return (
+            df.groupby("hora")["num_acidentes"].sum(),
+            df[datas >= hoje - pd.Timedelta(days=30)].groupby("data")["num_acidentes"].sum(),
+            df.groupby([df["latitude"].round(1), df["longitude"].round(1)])["num_acidentes"].sum(),
+            df.loc[(datas.dt.month == hoje.month) & (datas.dt.year == hoje.year), "num_acidentes"].sum(),
+        )
+
+    df = generate_accident_data(n, seed=42)
+    vistas, t_inicial = _cronometrar(DashboardViews().ingest, df)
+    novos = [generate_accident_data(tamanho_lote, seed=i) for i in range(lotes)]
+    inicio = time.perf_counter()
+    for lote in novos:
+        vistas.ingest(lote)
+        vistas.hourly_view(), vistas.daily_view(), vistas.heatmap_view(), vistas.accidents_this_month()
+    t_incremental = (time.perf_counter() - inicio) / lotes
+
+    total = pd.concat([df, *novos], ignore_index=True)
+    (por_hora, por_dia, celulas, mes), t_groupby = _cronometrar(groupby, total)
+    horario = vistas.hourly_view().set_index("hora")["num_acidentes"]
+    diario = vistas.daily_view().set_index("data")["num_acidentes"]
+    mapa = pd.DataFrame(vistas.heatmap_view()).set_index([0, 1])[2]
+    assert (horario[por_hora.index] == por_hora).all() and horario.sum() == por_hora.sum()
+    assert (diario[por_dia.index] == por_dia).all() and diario.sum() == por_dia.sum()
+    assert len(mapa) == len(celulas) and np.array_equal(mapa.sort_index().to_numpy(), celulas.sort_index().to_numpy())
+    assert vistas.accidents_this_month() == mes and vistas.outside_grid == 0
+    print(f"{len(total):,} registros | carga inicial: {t_inicial:.2f}s | lote de {tamanho_lote:,} + leituras: "
+          f"{t_incremental * 1e3:.1f} ms | groupby completo: {t_groupby * 1e3:.0f} ms | views iguais ao groupby")
+
+
+BENCHMARKS = {
+    "moda": bench_moda,
+    "prever_rapido": bench_prever_rapido,
+    "prever_lote": bench_prever_lote,
+    "artefato": bench_artefato,
+    "arvores": bench_arvores,
+    "historico": bench_historico,
+    "incremental": bench_incremental,
+    "shards": bench_shards,
+    "memoria": bench_memoria,
+    "gerador": bench_gerador,
+    "streaming": bench_streaming,
+    "dashboard": bench_dashboard,
+    "referencia": bench_referencia,
+    "vistas": bench_vistas,
+}
+
+if __name__ == "__main__":
+    nomes = sys.argv[1:] or list(BENCHMARKS)
+    for nome in nomes:
+        print(f"== {nome} ==")
+        BENCHMARKS[nome]()
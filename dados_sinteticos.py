@@ -0,0 +1,41 @@
+"""Dados sintéticos no formato do DATATRAN, usados pelos testes e pelos benchmarks."""
+import numpy as np
+import pandas as pd
+
+UFS = ["SP", "RJ", "MG", "RS", "PR", "BA", "SC", "GO", "PE", "CE"]
+MUNICIPIOS = [f"MUNICIPIO {i}" for i in range(200)]
+TIPOS_ACIDENTE = [
+    "Colisão traseira", "Saída de leito carroçável", "Colisão transversal",
+    "Tombamento", "Atropelamento de Pedestre", "Colisão frontal"
+]
+CONDICOES = ["Céu Claro", "Chuva", "Garoa/Chuvisco", "Nublado", "Sol", "Vento", "Nevoeiro/Neblina", "Ignorado"]
+
+
+def dados_brutos(n, seed=42):
+    """Gera `n` linhas no formato bruto do DATATRAN (2019 a 2024)"""
+    rng = np.random.default_rng(seed)
+    dias = pd.date_range("2019-01-01", "2024-12-31", freq="D")
+    datas = dias[rng.integers(0, len(dias), n)]
+    return pd.DataFrame({
+        "data_inversa": datas.strftime("%d/%m/%Y"),
+        "horario": pd.Series(rng.integers(0, 24, n)).map("{:02d}:00:00".format),
+        "uf": np.array(UFS, dtype=object)[rng.integers(0, len(UFS), n)],
+        "municipio": np.array(MUNICIPIOS, dtype=object)[rng.integers(0, len(MUNICIPIOS), n)],
+        "tipo_acidente": np.array(TIPOS_ACIDENTE, dtype=object)[rng.integers(0, len(TIPOS_ACIDENTE), n)],
+        "condicao_metereologica": np.array(CONDICOES, dtype=object)[rng.integers(0, len(CONDICOES), n)],
+    })
+
+
+def consultas(n, seed=7):
+    """Consultas aleatórias no formato do formulário de /predict"""
+    rng = np.random.default_rng(seed)
+    datas = pd.date_range("2024-01-01", "2025-12-31", freq="D")
+    for _ in range(n):
+        yield (
+            datas[rng.integers(len(datas))].date(),
+            int(rng.integers(24)),
+            UFS[rng.integers(len(UFS))],
+            MUNICIPIOS[rng.integers(len(MUNICIPIOS))],
+            CONDICOES[rng.integers(len(CONDICOES))],
+            TIPOS_ACIDENTE[rng.integers(len(TIPOS_ACIDENTE))],
+        )
@@ -2,15 +2,16 @@ from fasthtml.common import *
 import plotly.graph_objects as go
 import plotly.express as px
 import json
-from data_generator import get_hourly_accidents, get_daily_trend, get_heatmap_data, get_statistics
+from data_generator import get_hourly_accidents, get_daily_trend, get_heatmap_data, get_statistics, get_dashboard_snapshot
 import folium
 from folium.plugins import HeatMap
 import base64
 from io import BytesIO
 
-def create_hourly_chart():
+def create_hourly_chart(hourly_data=None):
     """Cria gráfico de acidentes por horário"""
-    hourly_data = get_hourly_accidents()
+    if hourly_data is None:
+        hourly_data = get_hourly_accidents()
     
     fig = go.Figure(data=[
         go.Bar(
@@ -35,9 +36,10 @@ def create_hourly_chart():
     
     return fig.to_html(include_plotlyjs=False, div_id="hourly-chart")
 
-def create_trend_chart():
+def create_trend_chart(trend_data=None):
     """Cria gráfico de tendência diária"""
-    trend_data = get_daily_trend()
+    if trend_data is None:
+        trend_data = get_daily_trend()
     
     fig = go.Figure(data=[
         go.Scatter(
@@ -63,7 +65,7 @@ def create_trend_chart():
     
     return fig.to_html(include_plotlyjs=False, div_id="trend-chart")
 
-def create_heatmap():
+def create_heatmap(heat_data=None):
     """Cria mapa de calor usando Folium"""
     try:
         # Criar mapa centrado no Brasil
@@ -74,7 +76,8 @@ def create_heatmap():
         )
         
         # Obter dados do mapa de calor
-        heat_data = get_heatmap_data()
+        if heat_data is None:
+            heat_data = get_heatmap_data()
         
         # Adicionar camada de calor
         if heat_data:
@@ -182,7 +185,9 @@ def get_dashboard_stats():
 
 def dashboard_content():
     """Retorna o conteúdo completo do dashboard"""
-    stats = get_dashboard_stats()
+    # Um único snapshot alimenta os cards e todos os gráficos da página
+    views = get_dashboard_snapshot().views()
+    stats = views['stats']
     
     return Div(
         # Cards de estatísticas
@@ -231,7 +236,7 @@ def dashboard_content():
                         cls="card-header"
                     ),
                     Div(
-                        Div(create_heatmap(), id="heatmap-container"),
+                        Div(create_heatmap(views['heatmap']), id="heatmap-container"),
                         cls="card-body p-0"
                     ),
                     cls="card"
@@ -310,10 +315,10 @@ def dashboard_content():
         # Scripts para renderizar gráficos
         Script(f"""
             // Renderizar gráfico de acidentes por horário
-            document.getElementById('hourly-chart-container').innerHTML = `{create_hourly_chart()}`;
+            document.getElementById('hourly-chart-container').innerHTML = `{create_hourly_chart(views['hourly'])}`;
             
             // Renderizar gráfico de tendência
-            document.getElementById('trend-chart-container').innerHTML = `{create_trend_chart()}`;
+            document.getElementById('trend-chart-container').innerHTML = `{create_trend_chart(views['daily'])}`;
             
             // Renderizar gráfico de condições meteorológicas
             document.getElementById('weather-chart-container').innerHTML = `{create_weather_distribution_chart()}`;
@@ -1,172 +1,300 @@
 import pandas as pd
 import numpy as np
-import json
-from datetime import datetime, timedelta
+import os
+from datetime import datetime
 import random
+import threading
+import time
+from reference_data import get_reference_data
+from materialized_views import DashboardViews, HOUR_LABELS
 
 def load_locations():
-    """Carrega dados de UFs e municípios"""
-    with open('uf_options.json', 'r', encoding='utf-8') as f:
-        uf_options = json.load(f)
-    
-    with open('municipios_por_uf.json', 'r', encoding='utf-8') as f:
-        municipios_por_uf = json.load(f)
-    
-    return uf_options, municipios_por_uf
-
-def generate_accident_data(num_records=1000):
-    """Gera dados simulados de acidentes para demonstração"""
-    uf_options, municipios_por_uf = load_locations()
-    
-    # Coordenadas aproximadas dos centros dos estados brasileiros
-    uf_coordinates = {
-        'AC': (-9.0238, -70.8120),  # Acre
-        'AL': (-9.5713, -36.7820),  # Alagoas
-        'AP': (1.4144, -51.7865),   # Amapá
-        'AM': (-4.1431, -69.8578),  # Amazonas
-        'BA': (-12.5797, -41.7007), # Bahia
-        'CE': (-5.4984, -39.3206),  # Ceará
-        'DF': (-15.7998, -47.8645), # Distrito Federal
-        'ES': (-19.1834, -40.3089), # Espírito Santo
-        'GO': (-15.827, -49.8362),  # Goiás
-        'MA': (-4.9609, -45.2744),  # Maranhão
-        'MT': (-12.6819, -56.9211), # Mato Grosso
-        'MS': (-20.7722, -54.7852), # Mato Grosso do Sul
-        'MG': (-18.5122, -44.5550), # Minas Gerais
-        'PA': (-3.9014, -52.4774),  # Pará
-        'PB': (-7.2399, -36.7819),  # Paraíba
-        'PR': (-24.89, -51.55),     # Paraná
-        'PE': (-8.8137, -36.9541),  # Pernambuco
-        'PI': (-8.5569, -42.7401),  # Piauí
-        'RJ': (-22.9099, -43.2095), # Rio de Janeiro
-        'RN': (-5.4026, -36.9541),  # Rio Grande do Norte
-        'RS': (-30.0346, -51.2177), # Rio Grande do Sul
-        'RO': (-10.9472, -62.8182), # Rondônia
-        'RR': (1.99, -61.33),       # Roraima
-        'SC': (-27.2423, -50.2189), # Santa Catarina
-        'SP': (-23.5505, -46.6333), # São Paulo
-        'SE': (-10.5741, -37.3857), # Sergipe
-        'TO': (-10.184, -48.3336)   # Tocantins
-    }
-    
-    data = []
-    
-    for _ in range(num_records):
-        # Selecionar UF aleatória
-        uf = random.choice(uf_options)
-        
-        # Selecionar município aleatório da UF
-        municipio = random.choice(municipios_por_uf[uf])
-        
-        # Gerar coordenadas próximas ao centro do estado
-        base_lat, base_lon = uf_coordinates[uf]
-        lat = base_lat + random.uniform(-2, 2)
-        lon = base_lon + random.uniform(-2, 2)
-        
-        # Gerar data aleatória nos últimos 365 dias
-        days_ago = random.randint(0, 365)
-        date = datetime.now() - timedelta(days=days_ago)
-        
-        # Gerar horário com distribuição realista (mais acidentes em horários de pico)
-        hour_weights = [2, 1, 1, 1, 2, 4, 8, 12, 10, 8, 6, 8, 10, 12, 15, 18, 20, 18, 15, 12, 8, 6, 4, 3]
-        hour = random.choices(range(24), weights=hour_weights)[0]
-        
-        # Número de acidentes (1-5, com peso maior para 1)
-        num_accidents = random.choices([1, 2, 3, 4, 5], weights=[60, 25, 10, 3, 2])[0]
-        
-        # Condição meteorológica
-        weather_conditions = ["Bom", "Chuva", "Nublado", "Vento", "Nevoeiro/Neblina", "Outro"]
-        weather_weights = [50, 20, 15, 8, 5, 2]
-        weather = random.choices(weather_conditions, weights=weather_weights)[0]
-        
-        data.append({
-            'data': date.strftime('%Y-%m-%d'),
-            'hora': f"{hour:02d}:00",
-            'uf': uf,
-            'municipio': municipio,
-            'latitude': lat,
-            'longitude': lon,
-            'num_acidentes': num_accidents,
-            'condicao_meteorologica': weather,
-            'dia_semana': date.strftime('%A'),
-            'mes': date.month,
-            'ano': date.year
-        })
-    
-    return pd.DataFrame(data)
+    """Carrega dados de UFs e municípios (compartilhados via reference_data)"""
+    reference = get_reference_data()
+    return reference.uf_options, reference.municipios_por_uf
 
-def get_hourly_accidents():
-    """Retorna dados de acidentes por horário para gráfico"""
-    df = generate_accident_data(500)
-    hourly = df.groupby('hora')['num_acidentes'].sum().reset_index()
+# Coordenadas aproximadas dos centros dos estados brasileiros
+UF_COORDINATES = {
+    'AC': (-9.0238, -70.8120),  # Acre
+    'AL': (-9.5713, -36.7820),  # Alagoas
+    'AP': (1.4144, -51.7865),   # Amapá
+    'AM': (-4.1431, -69.8578),  # Amazonas
+    'BA': (-12.5797, -41.7007), # Bahia
+    'CE': (-5.4984, -39.3206),  # Ceará
+    'DF': (-15.7998, -47.8645), # Distrito Federal
+    'ES': (-19.1834, -40.3089), # Espírito Santo
+    'GO': (-15.827, -49.8362),  # Goiás
+    'MA': (-4.9609, -45.2744),  # Maranhão
+    'MT': (-12.6819, -56.9211), # Mato Grosso
+    'MS': (-20.7722, -54.7852), # Mato Grosso do Sul
+    'MG': (-18.5122, -44.5550), # Minas Gerais
+    'PA': (-3.9014, -52.4774),  # Pará
+    'PB': (-7.2399, -36.7819),  # Paraíba
+    'PR': (-24.89, -51.55),     # Paraná
+    'PE': (-8.8137, -36.9541),  # Pernambuco
+    'PI': (-8.5569, -42.7401),  # Piauí
+    'RJ': (-22.9099, -43.2095), # Rio de Janeiro
+    'RN': (-5.4026, -36.9541),  # Rio Grande do Norte
+    'RS': (-30.0346, -51.2177), # Rio Grande do Sul
+    'RO': (-10.9472, -62.8182), # Rondônia
+    'RR': (1.99, -61.33),       # Roraima
+    'SC': (-27.2423, -50.2189), # Santa Catarina
+    'SP': (-23.5505, -46.6333), # São Paulo
+    'SE': (-10.5741, -37.3857), # Sergipe
+    'TO': (-10.184, -48.3336)   # Tocantins
+}
+
+# Distribuição realista dos horários (mais acidentes em horários de pico)
+HOUR_WEIGHTS = [2, 1, 1, 1, 2, 4, 8, 12, 10, 8, 6, 8, 10, 12, 15, 18, 20, 18, 15, 12, 8, 6, 4, 3]
+# Número de acidentes (1-5, com peso maior para 1)
+ACCIDENT_COUNTS = [1, 2, 3, 4, 5]
+ACCIDENT_WEIGHTS = [60, 25, 10, 3, 2]
+WEATHER_CONDITIONS = ["Bom", "Chuva", "Nublado", "Vento", "Nevoeiro/Neblina", "Outro"]
+WEATHER_WEIGHTS = [50, 20, 15, 8, 5, 2]
+
+# Esquema bruto do DATATRAN, o mesmo lido por AccidentPredictor.treinar
+DATATRAN_COLUMNS = ["data_inversa", "horario", "uf", "municipio", "tipo_acidente", "condicao_metereologica"]
+ACCIDENT_TYPES = {
+    "Colisão traseira": 20, "Saída de leito carroçável": 15, "Colisão transversal": 11,
+    "Colisão lateral mesmo sentido": 9, "Colisão com objeto": 8, "Tombamento": 6, "Colisão frontal": 6,
+    "Queda de ocupante de veículo": 6, "Atropelamento de Pedestre": 5, "Capotamento": 3,
+    "Colisão lateral sentido oposto": 3, "Engavetamento": 2, "Atropelamento de Animal": 2,
+    "Incêndio": 1, "Derramamento de carga": 0.5
+}
+# Condições meteorológicas com a grafia dos CSVs oficiais do DATATRAN
+RAW_WEATHER_WEIGHTS = {
+    "Céu Claro": 50, "Nublado": 15, "Chuva": 12, "Sol": 10, "Garoa/Chuvisco": 4, "Ignorado": 4,
+    "Nevoeiro/Neblina": 2, "Vento": 2, "Granizo": 0.1, "Neve": 0.01
+}
+
+def _probabilities(weights):
+    weights = np.asarray(weights, dtype=float)
+    return weights / weights.sum()
+
+def _sample_locations(rng, n, reference):
+    """Índices das UFs (uniforme) e municípios (uniforme dentro da UF) de `n` linhas"""
+    uf_idx = rng.integers(0, len(reference.uf_options), n)
+    counts = np.array(reference.municipio_counts)
+    starts = np.array(reference.municipio_starts)
+    all_municipios = np.array(reference.municipios_flat, dtype=object)
+    municipio_idx = starts[uf_idx] + (rng.random(n) * counts[uf_idx]).astype(int)
+    return uf_idx, all_municipios[municipio_idx]
+
+def generate_accident_data(num_records=1000, seed=None):
+    """Gera dados simulados de acidentes para demonstração
+    
+    Todas as colunas são sorteadas de uma vez com numpy.random.Generator, com
+    as mesmas distribuições de antes; `seed` torna o resultado reprodutível.
+    Textos repetidos (datas, horas, dias da semana) são montados uma vez por
+    valor distinto e espalhados pelas linhas.
+    """
+    reference = get_reference_data()
+    uf_options = reference.uf_options
+    rng = np.random.default_rng(seed)
+    
+    uf_idx, municipios = _sample_locations(rng, num_records, reference)
     
-    # Garantir que temos todas as 24 horas
-    all_hours = [f"{h:02d}:00" for h in range(24)]
-    hourly_complete = pd.DataFrame({'hora': all_hours})
-    hourly_complete = hourly_complete.merge(hourly, on='hora', how='left')
-    hourly_complete['num_acidentes'] = hourly_complete['num_acidentes'].fillna(0)
+    # Coordenadas próximas ao centro do estado
+    coordinates = np.array([UF_COORDINATES[uf] for uf in uf_options])
+    lat = coordinates[uf_idx, 0] + rng.uniform(-2, 2, num_records)
+    lon = coordinates[uf_idx, 1] + rng.uniform(-2, 2, num_records)
     
-    return hourly_complete
+    # Data aleatória nos últimos 365 dias
+    days = pd.date_range(end=pd.Timestamp(datetime.now().date()), periods=366, freq='D')[::-1]
+    days_ago = rng.integers(0, 366, num_records)
+    
+    hours = rng.choice(24, size=num_records, p=_probabilities(HOUR_WEIGHTS))
+    num_accidents = np.asarray(ACCIDENT_COUNTS)[rng.choice(len(ACCIDENT_COUNTS), size=num_records, p=_probabilities(ACCIDENT_WEIGHTS))]
+    weather = np.array(WEATHER_CONDITIONS, dtype=object)[rng.choice(len(WEATHER_CONDITIONS), size=num_records, p=_probabilities(WEATHER_WEIGHTS))]
+    
+    return pd.DataFrame({
+        'data': np.array(days.strftime('%Y-%m-%d'), dtype=object)[days_ago],
+        'hora': np.array(HOUR_LABELS, dtype=object)[hours],
+        'uf': np.array(uf_options, dtype=object)[uf_idx],
+        'municipio': municipios,
+        'latitude': lat,
+        'longitude': lon,
+        'num_acidentes': num_accidents,
+        'condicao_meteorologica': weather,
+        'dia_semana': np.array(days.day_name(), dtype=object)[days_ago],
+        'mes': days.month.to_numpy()[days_ago],
+        'ano': days.year.to_numpy()[days_ago]
+    })
 
-def get_daily_trend():
-    """Retorna dados de tendência diária dos últimos 30 dias"""
-    df = generate_accident_data(300)
+def iter_datatran_chunks(num_records, chunk_size=500_000, seed=None, start_date='2019-01-01', end_date='2024-12-31'):
+    """Gera registros sintéticos no esquema bruto do DATATRAN, em blocos de `chunk_size` linhas
     
-    # Filtrar últimos 30 dias
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=30)
+    Cada bloco é um DataFrame com DATATRAN_COLUMNS (data_inversa em %d/%m/%Y,
+    horario em %H:%M:%S). Só um bloco existe por vez, então a memória não
+    cresce com `num_records`. Com a mesma `seed` e o mesmo `chunk_size`, a
+    sequência é sempre a mesma.
+    """
+    reference = get_reference_data()
+    rng = np.random.default_rng(seed)
     
-    df['data'] = pd.to_datetime(df['data'])
-    df_recent = df[df['data'] >= start_date]
+    # Tabelas de textos montadas uma vez; os blocos só sorteiam índices
+    days = np.array(pd.date_range(start_date, end_date, freq='D').strftime('%d/%m/%Y'), dtype=object)
+    times = np.array([f"{h:02d}:{m:02d}:00" for h in range(24) for m in range(60)], dtype=object)
+    ufs = np.array(reference.uf_options, dtype=object)
+    accident_types = np.array(list(ACCIDENT_TYPES), dtype=object)
+    weather = np.array(list(RAW_WEATHER_WEIGHTS), dtype=object)
+    p_hours = _probabilities(HOUR_WEIGHTS)
+    p_types = _probabilities(list(ACCIDENT_TYPES.values()))
+    p_weather = _probabilities(list(RAW_WEATHER_WEIGHTS.values()))
     
-    daily = df_recent.groupby('data')['num_acidentes'].sum().reset_index()
-    daily['data'] = daily['data'].dt.strftime('%Y-%m-%d')
+    for start in range(0, num_records, chunk_size):
+        n = min(chunk_size, num_records - start)
+        uf_idx, municipios = _sample_locations(rng, n, reference)
+        minutes = rng.choice(24, size=n, p=p_hours) * 60 + rng.integers(0, 60, n)
+        yield pd.DataFrame({
+            'data_inversa': days[rng.integers(0, len(days), n)],
+            'horario': times[minutes],
+            'uf': ufs[uf_idx],
+            'municipio': municipios,
+            'tipo_acidente': accident_types[rng.choice(len(accident_types), size=n, p=p_types)],
+            'condicao_metereologica': weather[rng.choice(len(weather), size=n, p=p_weather)]
+        })
+
+def write_datatran(path, num_records, chunk_size=500_000, seed=None, **kwargs):
+    """Grava registros sintéticos do DATATRAN em NDJSON, CSV ou Parquet, bloco a bloco
     
-    # Preencher dias faltantes com 0
-    date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-    complete_dates = pd.DataFrame({'data': date_range.strftime('%Y-%m-%d')})
-    daily_complete = complete_dates.merge(daily, on='data', how='left')
-    daily_complete['num_acidentes'] = daily_complete['num_acidentes'].fillna(0)
+    O formato vem da extensão: .ndjson/.jsonl, .csv (separado por ';', em
+    latin-1, como os CSVs oficiais) ou .parquet (requer pyarrow). Os demais
+    argumentos vão para iter_datatran_chunks. Retorna o número de linhas gravadas.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    chunks = iter_datatran_chunks(num_records, chunk_size, seed, **kwargs)
+    written = 0
     
-    return daily_complete
+    if extension in ('.ndjson', '.jsonl'):
+        with open(path, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                chunk.to_json(f, orient='records', lines=True, force_ascii=False)
+                written += len(chunk)
+    elif extension == '.csv':
+        with open(path, 'w', encoding='latin-1', newline='') as f:
+            for chunk in chunks:
+                chunk.to_csv(f, sep=';', index=False, header=written == 0)
+                written += len(chunk)
+    elif extension == '.parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        schema = pa.schema([(col, pa.string()) for col in DATATRAN_COLUMNS])
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                written += len(chunk)
+    else:
+        raise ValueError(f"Formato não suportado: {path}")
+    return written
 
-def get_heatmap_data():
-    """Retorna dados para mapa de calor"""
-    df = generate_accident_data(200)
+DASHBOARD_RECORDS = 1000
+DASHBOARD_REFRESH_INTERVAL = 300
+
+class DashboardSnapshot:
+    """Conjunto de dados compartilhado pelas views do dashboard
     
-    # Agrupar por coordenadas aproximadas
-    df['lat_rounded'] = df['latitude'].round(1)
-    df['lon_rounded'] = df['longitude'].round(1)
+    Os dados são gerados (ou carregados por `loader`) uma vez e agregados em um
+    DashboardViews; registros novos entram com `ingest`, que atualiza os
+    agregados sem recalcular o resto. Depois de `refresh_interval` segundos o
+    próximo acesso monta um novo snapshot. As views são compartilhadas entre
+    requisições e não devem ser alteradas.
+    """
     
-    heatmap = df.groupby(['lat_rounded', 'lon_rounded'])['num_acidentes'].sum().reset_index()
-    heatmap = heatmap[heatmap['num_acidentes'] > 0]
+    def __init__(self, loader=None, refresh_interval=DASHBOARD_REFRESH_INTERVAL, num_records=DASHBOARD_RECORDS):
+        self.loader = loader or (lambda: generate_accident_data(num_records))
+        self.refresh_interval = refresh_interval
+        # Agregados e valores simulados do mesmo refresh; `views` lê os dois de uma
+        # vez, então os cards e os gráficos nunca misturam snapshots
+        self._state = (None, None)
+        self._expires = 0.0
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self.refreshes = 0
     
-    return heatmap[['lat_rounded', 'lon_rounded', 'num_acidentes']].values.tolist()
-
-def get_statistics():
-    """Retorna estatísticas gerais para o dashboard"""
-    df = generate_accident_data(1000)
+    def refresh(self):
+        """Carrega os dados e recalcula os agregados imediatamente; devolve o novo estado"""
+        aggregates = DashboardViews().ingest(self.loader())
+        # Predições hoje e alertas ativos (simulados), fixos durante o snapshot
+        simulated = {
+            'predictions_today': random.randint(400, 800),
+            'active_alerts': random.randint(15, 35)
+        }
+        with self._lock:
+            self._state = (aggregates, simulated)
+            self._expires = time.monotonic() + self.refresh_interval
+            self.refreshes += 1
+        return self._state
     
-    # Acidentes este mês
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    accidents_this_month = df[(df['mes'] == current_month) & (df['ano'] == current_year)]['num_acidentes'].sum()
+    def _current(self):
+        """Estado atual, montando um novo snapshot se o atual expirou"""
+        with self._lock:
+            if self._state[0] is not None and time.monotonic() < self._expires:
+                return self._state
+        return self.refresh()
     
-    # Predições hoje (simulado)
-    predictions_today = random.randint(400, 800)
+    def aggregates(self):
+        """DashboardViews do snapshot atual"""
+        return self._current()[0]
     
-    # Alertas ativos (simulado)
-    active_alerts = random.randint(15, 35)
+    def ingest(self, df):
+        """Acrescenta registros novos aos agregados do snapshot atual"""
+        return self.aggregates().ingest(df)
     
-    # Precisão do modelo (fixo)
-    model_accuracy = 89
+    def views(self, now=None):
+        """Dicionário com 'stats', 'hourly', 'daily' e 'heatmap', lido dos agregados"""
+        aggregates, simulated = self._current()
+        return {
+            'stats': {
+                'accidents_this_month': aggregates.accidents_this_month(now),
+                # Precisão do modelo (fixo)
+                'model_accuracy': 89,
+                **simulated
+            },
+            'hourly': aggregates.hourly_view(),
+            'daily': aggregates.daily_view(now),
+            'heatmap': aggregates.heatmap_view()
+        }
     
-    return {
-        'accidents_this_month': int(accidents_this_month),
-        'model_accuracy': model_accuracy,
-        'predictions_today': predictions_today,
-        'active_alerts': active_alerts
-    }
+    def start_auto_refresh(self):
+        """Renova o snapshot em segundo plano a cada `refresh_interval` segundos"""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return self._refresh_thread
+        
+        def loop():
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Erro ao atualizar dados do dashboard: {e}")
+                time.sleep(self.refresh_interval)
+        
+        self._refresh_thread = threading.Thread(target=loop, name='dashboard-refresh', daemon=True)
+        self._refresh_thread.start()
+        return self._refresh_thread
+
+_dashboard_snapshot = DashboardSnapshot()
+
+def get_dashboard_snapshot():
+    """Snapshot compartilhado usado pelo dashboard"""
+    return _dashboard_snapshot
+
+def get_hourly_accidents():
+    """Retorna dados de acidentes por horário para gráfico"""
+    return get_dashboard_snapshot().views()['hourly']
+
+def get_daily_trend():
+    """Retorna dados de tendência diária dos últimos 30 dias"""
+    return get_dashboard_snapshot().views()['daily']
+
+def get_heatmap_data():
+    """Retorna dados para mapa de calor"""
+    return get_dashboard_snapshot().views()['heatmap']
+
+def get_statistics():
+    """Retorna estatísticas gerais para o dashboard"""
+    return get_dashboard_snapshot().views()['stats']
 
 if __name__ == "__main__":
     # Teste das funções
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+import os
+
+# Região usada pelo modelo diário nacional (contagem total do dia)
+REGIAO_TOTAL = "BR"
+LAGS = (1, 2, 7, 14)
+JANELAS = (7, 14, 28)
+NOMES_FEATURES = [f"lag_{lag}" for lag in LAGS] + [f"{nome}_{w}" for w in JANELAS for nome in ("media", "std")]
+
+
+class FeatureStore:
+    """Histórico diário de acidentes por região, para as features de lag e janelas móveis.
+
+    As contagens ficam em uma matriz (região × dia) a partir de `inicio`, junto
+    com as somas acumuladas das contagens e dos quadrados. Com elas, `lag_*`,
+    `media_*` e `std_*` de qualquer dia saem em O(1), sem reler o histórico.
+    Os valores seguem `_criar_features` do treino: a janela termina no dia
+    anterior, usa os dias disponíveis (min_periods=1) e o que não existe vira 0.
+    """
+
+    def __init__(self, inicio=None, regioes=(), contagens=None):
+        self.inicio = None if inicio is None else np.datetime64(inicio, "D")
+        self.regioes = list(regioes)
+        self._codigos = {regiao: i for i, regiao in enumerate(self.regioes)}
+        self.contagens = np.zeros((len(self.regioes), 0), dtype=np.int32) if contagens is None else contagens
+        self._acumular(0)
+
+    @property
+    def n_dias(self):
+        return self.contagens.shape[1]
+
+    @property
+    def fim(self):
+        """Último dia com contagem, ou None se o histórico estiver vazio"""
+        return None if self.inicio is None or not self.n_dias else self.inicio + self.n_dias - 1
+
+    def _acumular(self, desde):
+        """Refaz as somas acumuladas a partir da coluna `desde` (colunas anteriores não mudaram)"""
+        n_regioes = len(self.regioes)
+        if desde == 0:
+            self._soma = np.zeros((n_regioes, self.n_dias + 1))
+            self._soma_quadrados = np.zeros((n_regioes, self.n_dias + 1))
+        else:
+            self._soma = np.pad(self._soma[:, :desde + 1], ((0, 0), (0, self.n_dias - desde)))
+            self._soma_quadrados = np.pad(self._soma_quadrados[:, :desde + 1], ((0, 0), (0, self.n_dias - desde)))
+        # Somas feitas direto nas matrizes de destino, sem cópias do tamanho do histórico
+        novos = self.contagens[:, desde:].astype(np.float64)
+        np.cumsum(novos, axis=1, out=self._soma[:, desde + 1:])
+        self._soma[:, desde + 1:] += self._soma[:, desde:desde + 1]
+        np.cumsum(np.square(novos, out=novos), axis=1, out=self._soma_quadrados[:, desde + 1:])
+        self._soma_quadrados[:, desde + 1:] += self._soma_quadrados[:, desde:desde + 1]
+
+    def _linhas(self, regioes, n, criar=False):
+        """Linha de cada região na matriz (-1 se desconhecida); com `criar`, regiões novas ganham linha.
+
+        As regiões são fatoradas antes, então o trabalho em Python é por região
+        distinta e não por linha (um Categorical é fatorado pelos próprios códigos).
+        """
+        if regioes is None:
+            codigos, unicos = np.zeros(n, dtype=np.intp), [REGIAO_TOTAL]
+        else:
+            codigos, unicos = pd.factorize(regioes)
+        if criar:
+            for regiao in unicos:
+                if regiao not in self._codigos:
+                    self._codigos[regiao] = len(self.regioes)
+                    self.regioes.append(regiao)
+        return np.array([self._codigos.get(regiao, -1) for regiao in unicos], dtype=np.intp)[codigos]
+
+    def adicionar(self, datas, contagens, regioes=None):
+        """Grava as contagens diárias de (data, região); `regioes=None` usa REGIAO_TOTAL.
+
+        Cada par substitui a contagem que existia para aquele dia e região, então
+        os dados devem ser de dias completos. Dias novos estendem o histórico e
+        só as somas acumuladas a partir do primeiro dia alterado são refeitas.
+        """
+        dias = np.asarray(datas, dtype="datetime64[D]")
+        contagens = np.asarray(contagens)
+        if not len(dias):
+            return self
+
+        linhas = self._linhas(regioes, len(dias), criar=True)
+        novas_regioes = len(self.regioes) - self.contagens.shape[0]
+
+        inicio = dias.min() if self.inicio is None else min(self.inicio, dias.min())
+        fim = dias.max() if self.fim is None else max(self.fim, dias.max())
+        antes = 0 if self.inicio is None else int((self.inicio - inicio).astype(int))
+        depois = int((fim - inicio).astype(int)) + 1 - antes - self.n_dias
+        self.contagens = np.pad(self.contagens, ((0, novas_regioes), (antes, depois)))
+        self.inicio = inicio
+
+        colunas = (dias - inicio).astype(int)
+        self.contagens[linhas, colunas] = contagens
+        self._acumular(0 if antes or novas_regioes else int(colunas.min()))
+        return self
+
+    def features(self, datas, regioes=None, dtype=np.float64):
+        """Lags, médias e desvios móveis de cada (data, região), vetorizados.
+
+        Devolve um dicionário nome da feature → array `dtype`, na forma usada por
+        `_criar_features`. Regiões desconhecidas e dias fora do histórico ficam em 0.
+        Os cálculos são em float64; só o resultado de cada feature é convertido.
+        """
+        dias = np.asarray(datas, dtype="datetime64[D]")
+        n = len(dias)
+        if self.inicio is None or not len(self.regioes) or not self.n_dias:
+            # Histórico vazio: não há linha para indexar, tudo fica em 0
+            return {nome: np.zeros(n, dtype=dtype) for nome in NOMES_FEATURES}
+
+        linhas = self._linhas(regioes, n)
+        conhecida = linhas >= 0
+        linhas = np.where(conhecida, linhas, 0)
+        posicoes = (dias - self.inicio).astype(int)
+
+        resultado = {}
+        for lag in LAGS:
+            dia = posicoes - lag
+            valido = conhecida & (dia >= 0) & (dia < self.n_dias)
+            resultado[f"lag_{lag}"] = np.where(valido, self.contagens[linhas, np.clip(dia, 0, self.n_dias - 1)], 0).astype(dtype)
+
+        for w in JANELAS:
+            # Janela [posição - w, posição) recortada ao histórico existente
+            a = np.clip(posicoes - w, 0, self.n_dias)
+            b = np.clip(posicoes, 0, self.n_dias)
+            tamanho = np.where(conhecida, b - a, 0)
+            soma = self._soma[linhas, b] - self._soma[linhas, a]
+            soma_quadrados = self._soma_quadrados[linhas, b] - self._soma_quadrados[linhas, a]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                media = np.where(tamanho > 0, soma / tamanho, 0.0)
+                variancia = (soma_quadrados - soma * media) / (tamanho - 1)
+            resultado[f"media_{w}"] = media.astype(dtype, copy=False)
+            resultado[f"std_{w}"] = np.where(tamanho > 1, np.sqrt(np.maximum(variancia, 0.0)), 0.0).astype(dtype, copy=False)
+        return resultado
+
+    def features_dia(self, data, regiao=REGIAO_TOTAL):
+        """Mesmo resultado de `features` para uma única consulta, sem arrays temporários"""
+        linha = self._codigos.get(regiao)
+        posicao = None if linha is None or self.inicio is None else int((np.datetime64(data, "D") - self.inicio).astype(int))
+        resultado = {}
+        for lag in LAGS:
+            dia = -1 if posicao is None else posicao - lag
+            resultado[f"lag_{lag}"] = float(self.contagens[linha, dia]) if 0 <= dia < self.n_dias else 0.0
+        for w in JANELAS:
+            a = 0 if posicao is None else min(max(posicao - w, 0), self.n_dias)
+            b = 0 if posicao is None else min(max(posicao, 0), self.n_dias)
+            tamanho = b - a
+            media = variancia = 0.0
+            if tamanho > 0:
+                soma = self._soma[linha, b] - self._soma[linha, a]
+                media = soma / tamanho
+                if tamanho > 1:
+                    variancia = (self._soma_quadrados[linha, b] - self._soma_quadrados[linha, a] - soma * media) / (tamanho - 1)
+            resultado[f"media_{w}"] = media
+            resultado[f"std_{w}"] = max(variancia, 0.0) ** 0.5
+        return resultado
+
+    def salvar(self, caminho="historico_acidentes.npz"):
+        """Grava o histórico em um .npz, trocado de uma vez com os.replace"""
+        with open(caminho + ".tmp", "wb") as f:
+            np.savez(
+                f,
+                inicio=np.array([] if self.inicio is None else [self.inicio], dtype="datetime64[D]"),
+                regioes=np.array(self.regioes, dtype=str),
+                contagens=self.contagens
+            )
+        os.replace(caminho + ".tmp", caminho)
+
+    @classmethod
+    def abrir(cls, caminho="historico_acidentes.npz"):
+        """Carrega um histórico salvo por `salvar`"""
+        with np.load(caminho, allow_pickle=False) as dados:
+            inicio = dados["inicio"]
+            return cls(
+                inicio=inicio[0] if len(inicio) else None,
+                regioes=dados["regioes"].tolist(),
+                contagens=dados["contagens"].astype(np.int32)
+            )
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import threading
+from datetime import datetime
+
+HOUR_LABELS = [f"{h:02d}:00" for h in range(24)]
+TREND_DAYS = 31
+
+# Grade do mapa de calor em décimos de grau (mesmo arredondamento de round(1)),
+# cobrindo o Brasil com folga para o deslocamento aleatório das coordenadas
+GRID_LAT = (-380, 100)
+GRID_LON = (-780, -280)
+
+
+def _by_unique(values, convert):
+    """Aplica `convert` só aos valores distintos (poucas datas e horas por lote)"""
+    codes, uniques = pd.factorize(values)
+    return convert(np.asarray(uniques))[codes]
+
+
+class DashboardViews:
+    """Agregados do dashboard mantidos em arrays e atualizados a cada ingestão
+
+    - `hourly`: 24 contadores de acidentes por hora;
+    - `daily`: buffer circular de `history_days` dias terminando em `last_day`;
+      dias que saem da janela são zerados quando o buffer avança;
+    - `grid`: contador por célula de 0,1° × 0,1° para o mapa de calor.
+
+    `ingest` custa O(registros novos); as leituras custam O(bins) e ficam em
+    cache até a próxima ingestão (ou a virada do dia, para as views por data).
+    """
+
+    def __init__(self, history_days=TREND_DAYS):
+        if history_days < TREND_DAYS:
+            raise ValueError(f"history_days deve ser pelo menos {TREND_DAYS} (tendência e mês atual).")
+        self.history_days = history_days
+        self.hourly = np.zeros(24, dtype=np.int64)
+        self.daily = np.zeros(history_days, dtype=np.int64)
+        self.grid = np.zeros((GRID_LAT[1] - GRID_LAT[0] + 1, GRID_LON[1] - GRID_LON[0] + 1), dtype=np.int64)
+        self.last_day = None
+        self.records = 0
+        self.outside_grid = 0
+        self.version = 0
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _advance(self, day):
+        """Move o fim do buffer diário para `day`, zerando os dias que saem da janela"""
+        if self.last_day is None or day - self.last_day >= self.history_days:
+            self.daily[:] = 0
+        elif day > self.last_day:
+            slots = np.arange(self.last_day + 1, day + 1) % self.history_days
+            self.daily[slots] = 0
+        self.last_day = day if self.last_day is None else max(self.last_day, day)
+
+    def ingest(self, df):
+        """Soma registros novos (colunas data, hora, latitude, longitude, num_acidentes)"""
+        if not len(df):
+            return self
+        num_accidents = df['num_acidentes'].to_numpy(dtype=np.int64)
+        hours = _by_unique(df['hora'], lambda h: np.array([int(v[:2]) for v in h]))
+        days = _by_unique(df['data'], lambda d: pd.to_datetime(d).to_numpy().astype('datetime64[D]').astype(np.int64))
+        lat = np.rint(df['latitude'].to_numpy(dtype=np.float64) * 10).astype(np.int64) - GRID_LAT[0]
+        lon = np.rint(df['longitude'].to_numpy(dtype=np.float64) * 10).astype(np.int64) - GRID_LON[0]
+        inside = (lat >= 0) & (lat < self.grid.shape[0]) & (lon >= 0) & (lon < self.grid.shape[1])
+
+        with self._lock:
+            np.add.at(self.hourly, hours, num_accidents)
+
+            self._advance(int(days.max()))
+            recent = days > self.last_day - self.history_days
+            np.add.at(self.daily, days[recent] % self.history_days, num_accidents[recent])
+
+            np.add.at(self.grid, (lat[inside], lon[inside]), num_accidents[inside])
+
+            self.records += len(df)
+            self.outside_grid += int((~inside).sum())
+            self.version += 1
+            self._cache.clear()
+        return self
+
+    def _days(self, first, last):
+        """Contagens dos dias [first, last] (números de dia); dias fora do buffer valem 0"""
+        days = np.arange(first, last + 1)
+        if self.last_day is None:
+            return np.zeros(len(days), dtype=np.int64)
+        valid = (days <= self.last_day) & (days > self.last_day - self.history_days)
+        return np.where(valid, self.daily[days % self.history_days], 0)
+
+    def _cached(self, key, build):
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                value = self._cache[key] = build()
+            return value
+
+    def hourly_view(self):
+        """Acidentes por horário, com as 24 horas"""
+        return self._cached('hourly', lambda: pd.DataFrame({
+            'hora': HOUR_LABELS,
+            'num_acidentes': self.hourly.astype(np.float64)
+        }))
+
+    def daily_view(self, now=None):
+        """Tendência dos últimos 30 dias (até hoje), com os dias sem acidentes em 0"""
+        today = pd.Timestamp((now or datetime.now()).date())
+        day = int(np.datetime64(today.date(), 'D').astype(np.int64))
+        return self._cached(('daily', day), lambda: pd.DataFrame({
+            'data': pd.date_range(end=today, periods=TREND_DAYS, freq='D').strftime('%Y-%m-%d'),
+            'num_acidentes': self._days(day - TREND_DAYS + 1, day).astype(np.float64)
+        }))
+
+    def heatmap_view(self):
+        """Células com acidentes como [[lat, lon, total]] para o mapa de calor"""
+        def build():
+            lat, lon = np.nonzero(self.grid)
+            return np.column_stack([
+                (lat + GRID_LAT[0]) / 10, (lon + GRID_LON[0]) / 10, self.grid[lat, lon]
+            ]).tolist()
+        return self._cached('heatmap', build)
+
+    def accidents_this_month(self, now=None):
+        """Total do mês corrente, somado do buffer diário"""
+        today = (now or datetime.now()).date()
+        day = int(np.datetime64(today, 'D').astype(np.int64))
+        return self._cached(('month', day), lambda: int(self._days(day - today.day + 1, day).sum()))
@@ -4,21 +4,204 @@ from datetime import datetime
 import json
 import pickle
 import os
-from preditor_ofc import AccidentPredictor
+import threading
+import time
+from collections import OrderedDict
+
+MODEL_PATH = 'modelo_acidentes.pkl'
+
+class PredictionCache:
+    """Cache LRU com expiração (TTL) das predições do modelo
+    
+    As entradas pertencem ao modelo que as calculou: quando o objeto do modelo
+    muda (novo carregamento), o cache é esvaziado na próxima consulta.
+    """
+    
+    def __init__(self, maxsize=4096, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._model = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(data, horario, uf, municipio, condicao_meteorologica):
+        """Chave normalizada da consulta; o modelo só usa a hora cheia do horário"""
+        return (
+            data.strip(),
+            int(horario.split(':')[0]),
+            uf.strip().upper(),
+            municipio.strip().upper(),
+            condicao_meteorologica.strip()
+        )
+    
+    def _check_model(self, model):
+        if model is not self._model:
+            self._entries.clear()
+            self._model = model
+    
+    def get(self, model, key):
+        with self._lock:
+            self._check_model(model)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, model, key, value):
+        with self._lock:
+            if model is not self._model:
+                # Resultado de um modelo que já foi substituído: descartar
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Descarta todas as entradas (ex.: ao trocar os modelos por UF)"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """Contadores para dimensionar o cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+class ShardRegistry:
+    """Modelos por UF gerados por AccidentPredictor.treinar_por_uf, carregados sob demanda
+    
+    Só os shards consultados são lidos do disco, então a memória acompanha as
+    regiões ativas; com `max_loaded`, os shards usados há mais tempo são
+    descartados quando o limite é atingido.
+    """
+    
+    def __init__(self, directory='modelos_uf', max_loaded=None, inference_backend='lightgbm'):
+        self.directory = directory
+        self.max_loaded = max_loaded
+        self.inference_backend = inference_backend
+        with open(os.path.join(directory, 'indice.json'), 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def available(self):
+        """UFs que têm shard treinado"""
+        return sorted(self.index['shards'])
+    
+    def get(self, uf):
+        """Modelo da UF, carregado no primeiro uso; None se a UF não tem shard"""
+        shard = self.index['shards'].get(uf)
+        if shard is None:
+            return None
+        with self._lock:
+            predictor = self._loaded.get(uf)
+            if predictor is None:
+                from preditor_ofc import AccidentPredictor
+                predictor = AccidentPredictor.carregar_modelo(os.path.join(self.directory, shard['prefixo']))
+                if self.inference_backend == 'numpy':
+                    predictor.usar_arvores_compiladas()
+                self._loaded[uf] = predictor
+                while self.max_loaded and len(self._loaded) > self.max_loaded:
+                    self._loaded.popitem(last=False)
+            self._loaded.move_to_end(uf)
+            return predictor
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'granularidade': self.index['granularidade'],
+                'available': len(self.index['shards']),
+                'loaded': list(self._loaded),
+                'max_loaded': self.max_loaded
+            }
 
 class SafeWayPredictor:
-    def __init__(self):
-        self.predictor = None
+    def __init__(self, cache_size=4096, cache_ttl=300, model_path=MODEL_PATH, inference_backend='lightgbm'):
+        self.model_path = model_path
+        # 'lightgbm' chama o booster; 'numpy' usa as árvores achatadas de tree_inference
+        self.inference_backend = inference_backend
+        # (modelo, assinatura dos arquivos de onde ele veio), trocados juntos
+        self._active = (None, None)
         self.model_loaded = False
-        self.load_model()
+        self.risk_cube = None
+        self.shards = None
+        self.prediction_cache = PredictionCache(cache_size, cache_ttl)
+        # O modelo é carregado no primeiro uso (ou por warm_up), não na importação
+        self._ready = threading.Event()
+        self._load_lock = threading.Lock()
+        self._warm_up_thread = None
+        self._model_signature = None
+        self._reload_thread = None
+    
+    @property
+    def predictor(self):
+        return self._active[0]
+    
+    @predictor.setter
+    def predictor(self, predictor):
+        # Modelo sem arquivos de origem conhecidos: o cubo de risco não é usado com ele
+        self._active = (predictor, None)
+    
+    def _activate(self, predictor, signature):
+        """Troca o modelo e a assinatura dos arquivos de onde ele foi lido com uma única atribuição"""
+        self._active = (predictor, signature)
+    
+    def is_ready(self):
+        """Indica se o carregamento do modelo já terminou"""
+        return self._ready.is_set()
+    
+    def ensure_loaded(self):
+        """Carrega o modelo se ainda não foi carregado
+        
+        Chamadas concorrentes, inclusive durante o warm-up em segundo plano,
+        esperam o mesmo carregamento em vez de repeti-lo.
+        """
+        if self._ready.is_set():
+            return
+        with self._load_lock:
+            if not self._ready.is_set():
+                self.load_model()
+    
+    def warm_up(self, background=True):
+        """Inicia o carregamento do modelo, por padrão em uma thread de fundo"""
+        if not background:
+            self.ensure_loaded()
+            return None
+        if self._warm_up_thread is None and not self._ready.is_set():
+            self._warm_up_thread = threading.Thread(target=self.ensure_loaded, name='model-warm-up', daemon=True)
+            self._warm_up_thread.start()
+        return self._warm_up_thread
     
     def load_model(self):
         """Carrega ou treina o modelo de predição"""
         try:
             # Tentar carregar modelo existente
-            if os.path.exists('modelo_acidentes.pkl'):
-                with open('modelo_acidentes.pkl', 'rb') as f:
-                    self.predictor = pickle.load(f)
+            if os.path.exists(self._artifact_paths()[0]):
+                self._model_signature = self._file_signature()
+                self._activate(self._read_model(), self._model_signature)
                 self.model_loaded = True
                 print("Modelo carregado com sucesso!")
             else:
@@ -29,9 +212,98 @@ class SafeWayPredictor:
             print(f"Erro ao carregar modelo: {e}")
             # Fallback para predição simulada
             self.model_loaded = False
+        finally:
+            self._ready.set()
+    
+    def _artifact_paths(self):
+        """Arquivos do modelo ativo; o formato nativo (.txt + .json) tem preferência sobre o pickle"""
+        prefix = os.path.splitext(self.model_path)[0]
+        native = [prefix + '.txt', prefix + '.json']
+        if all(os.path.exists(path) for path in native):
+            return native
+        return [self.model_path]
+    
+    def _history_path(self):
+        """Histórico diário das features de lag, atualizado sem retreinar o modelo"""
+        return os.path.splitext(self.model_path)[0] + '.historico.npz'
+    
+    def _file_signature(self):
+        """Identifica a versão dos arquivos do modelo (e do histórico, se houver) pelo mtime e tamanho"""
+        paths = self._artifact_paths()
+        if os.path.exists(self._history_path()):
+            paths = paths + [self._history_path()]
+        return tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, paths))
+    
+    def _read_model(self):
+        paths = self._artifact_paths()
+        if len(paths) == 2:
+            from preditor_ofc import AccidentPredictor
+            predictor = AccidentPredictor.carregar_modelo(os.path.splitext(paths[0])[0])
+        else:
+            with open(paths[0], 'rb') as f:
+                predictor = pickle.load(f)
+            if os.path.exists(self._history_path()):
+                from feature_store import FeatureStore
+                predictor.historico = FeatureStore.abrir(self._history_path())
+        
+        if self.inference_backend == 'numpy' and getattr(predictor, 'treinado', False):
+            predictor.usar_arvores_compiladas()
+        return predictor
+    
+    def reload_if_changed(self):
+        """Recarrega o modelo se o arquivo mudou desde o último carregamento
+        
+        O novo modelo é carregado e validado com uma predição de teste antes de
+        substituir o atual com uma única atribuição; requisições em andamento
+        terminam com a referência antiga. Um arquivo inválido é ignorado até
+        mudar de novo. Retorna True quando o modelo foi trocado.
+        """
+        try:
+            signature = self._file_signature()
+        except FileNotFoundError:
+            return False
+        if signature == self._model_signature:
+            return False
+        self._model_signature = signature
+        
+        try:
+            candidate = self._read_model()
+            previsao = candidate.prever_rapido(
+                datetime.now(), 12, 'SP', 'SAO PAULO', 'Chuva', tipo_acidente='COLISAO'
+            )
+            if not np.isfinite(previsao):
+                raise ValueError(f"predição de teste inválida: {previsao}")
+        except Exception as e:
+            print(f"Novo modelo rejeitado, mantendo o atual: {e}")
+            return False
+        
+        self._activate(candidate, signature)
+        self.model_loaded = True
+        print("Modelo recarregado com sucesso!")
+        return True
+    
+    def start_auto_reload(self, interval=5):
+        """Verifica o arquivo do modelo a cada `interval` segundos e recarrega quando mudar"""
+        if self._reload_thread is not None and self._reload_thread.is_alive():
+            return self._reload_thread
+        
+        def loop():
+            self.ensure_loaded()
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    print(f"Erro ao verificar modelo: {e}")
+        
+        self._reload_thread = threading.Thread(target=loop, name='model-auto-reload', daemon=True)
+        self._reload_thread.start()
+        return self._reload_thread
     
     def create_and_train_model(self):
         """Cria e treina um novo modelo usando dados simulados"""
+        from preditor_ofc import AccidentPredictor
+        
         try:
             # Criar instância do preditor
             self.predictor = AccidentPredictor()
@@ -48,8 +320,10 @@ class SafeWayPredictor:
             self.predictor.treinado = True
             
             # Salvar modelo
-            with open('modelo_acidentes.pkl', 'wb') as f:
+            with open(self.model_path, 'wb') as f:
                 pickle.dump(self.predictor, f)
+            self._model_signature = self._file_signature()
+            self._activate(self.predictor, self._model_signature)
             
             self.model_loaded = True
             print("Modelo criado e treinado com sucesso!")
@@ -71,44 +345,107 @@ class SafeWayPredictor:
         
         return df
     
+    def enable_risk_cube(self, horizon_days=7, interval=300):
+        """Ativa o cubo de risco pré-calculado, atualizado em uma thread de fundo"""
+        from risk_cube import RiskCube
+        
+        self.ensure_loaded()
+        # O último arquivo do artefato é regravado a cada exportação
+        self.risk_cube = RiskCube(self._artifact_paths()[-1], horizon_days=horizon_days)
+        self.risk_cube.start(lambda: self._active if self.model_loaded else None, interval=interval)
+        return self.risk_cube
+    
+    def enable_shards(self, directory='modelos_uf', max_loaded=None):
+        """Ativa os modelos por UF; UFs sem shard continuam no modelo nacional"""
+        self.shards = ShardRegistry(directory, max_loaded=max_loaded, inference_backend=self.inference_backend)
+        # Previsões já em cache vieram do modelo nacional
+        self.prediction_cache.clear()
+        return self.shards
+    
+    def _model_for(self, uf, national=None):
+        """Shard da UF, se houver, ou o modelo nacional (`national`, por padrão o atual)"""
+        shard = self.shards.get(uf) if self.shards is not None else None
+        if shard is not None:
+            return shard
+        return self.predictor if national is None else national
+    
     def predict_accidents(self, data, horario, uf, municipio, condicao_meteorologica):
         """Faz predição de acidentes"""
         try:
-            if not self.model_loaded or self.predictor is None:
+            self.ensure_loaded()
+            predictor, signature = self._active
+            if not self.model_loaded or predictor is None:
                 # Fallback para predição simulada
                 return self.simulate_prediction(data, horario, uf, municipio, condicao_meteorologica)
             
-            # Preparar dados para predição
-            data_dt = datetime.strptime(data, '%Y-%m-%d')
-            data_inversa = int(data_dt.strftime('%Y%m%d'))
+            chave = self.prediction_cache.make_key(data, horario, uf, municipio, condicao_meteorologica)
+            previsao = self.prediction_cache.get(predictor, chave)
+            if previsao is not None:
+                return previsao
             
-            # Converter horário para formato numérico
-            horario_num = int(horario.replace(':', ''))
+            # Daqui em diante a consulta usa os valores normalizados da chave
+            data, hora, uf, municipio, condicao_meteorologica = chave
             
-            # Criar DataFrame com os dados
-            dados_predicao = pd.DataFrame({
-                'data_inversa': [data_inversa],
-                'horario': [horario_num],
-                'uf': [uf],
-                'municipio': [municipio],
-                'tipo_acidente': ['COLISAO'],  # Valor padrão
-                'condicao_meteorologica': [condicao_meteorologica]
-            })
+            # O cubo de risco é do modelo nacional e só vale se foi calculado por
+            # este mesmo modelo; UFs com shard vão direto ao shard
+            modelo = self._model_for(uf, predictor)
+            if self.risk_cube is not None and modelo is predictor and signature is not None:
+                previsao = self.risk_cube.lookup(
+                    data, f"{hora:02d}:00", uf, municipio, condicao_meteorologica, assinatura=signature
+                )
             
-            # Fazer predição usando o modelo real
-            if hasattr(self.predictor, 'prever') and self.predictor.treinado:
-                resultado = self.predictor.prever(dados_predicao)
-                if isinstance(resultado, pd.DataFrame) and 'previsoes_acidentes' in resultado.columns:
-                    return float(resultado['previsoes_acidentes'].iloc[0])
-                else:
-                    return float(resultado[0]) if hasattr(resultado, '__getitem__') else float(resultado)
-            else:
-                return self.simulate_prediction(data, horario, uf, municipio, condicao_meteorologica)
+            # Fazer predição usando o modelo real, pelo caminho de uma linha (sem pandas)
+            if previsao is None:
+                if not (hasattr(modelo, 'prever_rapido') and modelo.treinado):
+                    return self.simulate_prediction(data, horario, uf, municipio, condicao_meteorologica)
+                data_dt = datetime.strptime(data, '%Y-%m-%d')
+                previsao = modelo.prever_rapido(
+                    data_dt, hora, uf, municipio, condicao_meteorologica,
+                    tipo_acidente='COLISAO'  # Valor padrão
+                )
+            
+            self.prediction_cache.put(predictor, chave, previsao)
+            return previsao
                 
         except Exception as e:
             print(f"Erro na predição: {e}")
             return self.simulate_prediction(data, horario, uf, municipio, condicao_meteorologica)
     
+    def get_cache_stats(self):
+        """Retorna os contadores do cache de predições"""
+        return self.prediction_cache.stats()
+    
+    def predict_batch(self, dados, chunk_size=100_000):
+        """Faz predição vetorizada para um DataFrame de consultas
+        
+        Espera as colunas data ('YYYY-MM-DD'), horario ('HH:MM' ou hora inteira),
+        uf, municipio e condicao_meteorologica; devolve uma cópia com a coluna
+        'previsao' (float32).
+        """
+        self.ensure_loaded()
+        if not self.model_loaded or self.predictor is None or not hasattr(self.predictor, 'prever_lote'):
+            raise RuntimeError("Modelo não carregado; predição em lote indisponível.")
+        
+        horario = dados['horario']
+        horas = horario.str.slice(0, 2).astype(int) if horario.dtype == object or horario.dtype == 'str' else horario
+        
+        # Com shards, cada UF é pontuada pelo próprio modelo
+        grupos = {None: np.arange(len(dados))} if self.shards is None else dados.groupby('uf', observed=True).indices
+        horas = np.asarray(horas)
+        previsao = np.empty(len(dados), dtype=np.float32)
+        for uf, linhas in grupos.items():
+            modelo = self.predictor if uf is None else self._model_for(uf)
+            parte = dados.iloc[linhas]
+            previsao[linhas] = modelo.prever_lote(
+                parte['data'], horas[linhas], parte['uf'], parte['municipio'], parte['condicao_meteorologica'],
+                tipos_acidente=np.full(len(parte), 'COLISAO', dtype=object),  # Valor padrão, como em predict_accidents
+                tamanho_bloco=chunk_size
+            )
+        
+        resultado = dados.copy()
+        resultado['previsao'] = previsao
+        return resultado
+    
     def simulate_prediction(self, data, horario, uf, municipio, condicao_meteorologica):
         """Simula predição baseada em regras heurísticas"""
         import random
@@ -148,6 +485,13 @@ class SafeWayPredictor:
     
     def get_model_info(self):
         """Retorna informações sobre o modelo"""
+        if not self.is_ready():
+            return {
+                'status': 'Carregando',
+                'tipo': 'LightGBM Regressor',
+                'precisao': None,
+                'treinado': False
+            }
         if self.model_loaded and self.predictor:
             return {
                 'status': 'Carregado',
@@ -163,9 +507,17 @@ class SafeWayPredictor:
                 'treinado': True
             }
 
-# Instância global do preditor
+# Instância global do preditor (o modelo só é carregado no primeiro uso ou no warm-up)
 safeway_predictor = SafeWayPredictor()
 
+def warm_up_model(background=True):
+    """Inicia o carregamento do modelo global; use no startup do servidor"""
+    return safeway_predictor.warm_up(background)
+
+def is_model_ready():
+    """Indica se o modelo global já está pronto para predições"""
+    return safeway_predictor.is_ready()
+
 def predict_accident_probability(data, horario, uf, municipio, condicao_meteorologica):
     """Função principal para predição de acidentes"""
     return safeway_predictor.predict_accidents(data, horario, uf, municipio, condicao_meteorologica)
@@ -1,23 +1,14 @@
 from fasthtml.common import *
-import json
 from datetime import datetime, date
+from reference_data import get_reference_data
 
-# Carregar dados JSON
+# Carregar dados JSON (compartilhados via reference_data, relidos só se os arquivos mudarem)
 def load_json_data():
-    with open('uf_options.json', 'r', encoding='utf-8') as f:
-        uf_options = json.load(f)
-    
-    with open('municipios_por_uf.json', 'r', encoding='utf-8') as f:
-        municipios_por_uf = json.load(f)
-    
-    with open('condicoes_metereologicas_options.json', 'r', encoding='utf-8') as f:
-        condicoes_options = json.load(f)
-    
-    return uf_options, municipios_por_uf, condicoes_options
-
-uf_options, municipios_por_uf, condicoes_options = load_json_data()
+    reference = get_reference_data()
+    return reference.uf_options, reference.municipios_por_uf, reference.condicoes
 
 def prediction_form():
+    uf_options, _, condicoes_options = load_json_data()
     return Div(
         Div(
             H5("Formulário de Predição de Acidentes", cls="mb-0"),
@@ -171,7 +162,7 @@ def prediction_page_content(formatted_result=None):
         
         # Script para atualizar municípios dinamicamente
         Script(f"""
-            const municipiosPorUf = {json.dumps(municipios_por_uf)};
+            const municipiosPorUf = {get_reference_data().municipios_json};
             
             function updateMunicipios() {{
                 const ufSelect = document.getElementById('uf_select');
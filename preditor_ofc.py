@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
+import os
+import re
 import json
+import hashlib
 import pickle
 import lightgbm as lgb
 from datetime import datetime
@@ -10,20 +13,176 @@ from sklearn.metrics import r2_score, mean_squared_error
 import holidays
 import warnings
 import itertools
+import time
+from joblib import Parallel, delayed, effective_n_jobs
+from feature_store import FeatureStore, REGIAO_TOTAL
 
 warnings.filterwarnings("ignore")
 
+# Versão do código de _processar_dados/_criar_features: incrementar a cada mudança
+# que altere os dados agregados ou as features, para invalidar o cache em disco.
+VERSAO_FEATURES = 3
+COLUNAS_CATEGORICAS = ["uf", "municipio", "tipo_acidente", "clima"]
+COLUNAS_DATATRAN = ["data_inversa", "horario", "uf", "municipio", "tipo_acidente", "condicao_metereologica"]
+COLUNAS_MODA = ["uf", "municipio", "tipo_acidente", "condicao_metereologica"]
+# Plano de tipos: textos repetidos como category desde a leitura, inteiros no menor
+# tipo que comporta o valor e features contínuas em float32. As matrizes da
+# previsão (prever_rapido, prever_lote) também são float32, para que cada valor
+# chegue ao modelo exatamente como no treino.
+TIPOS_DATATRAN = {col: "category" for col in COLUNAS_MODA} | {"data_inversa": str, "horario": str}
+TIPOS_FEATURES = {
+    "ano": "int16", "mes": "int8", "dia_semana": "int8", "dia_ano": "int16", "semana": "int8",
+    "fim_semana": "int8", "feriado": "int8", "feriado_fim_semana": "int8",
+    "dia_semana_sin": "float32", "dia_semana_cos": "float32", "dia_ano_sin": "float32", "dia_ano_cos": "float32",
+    "hora_media": "float32"
+} | {f"lag_{i}": "float32" for i in [1, 2, 7, 14]} \
+  | {f"{nome}_{i}": "float32" for nome in ["media", "std"] for i in [7, 14, 28]} \
+  | {f"{c}_enc": "int16" for c in COLUNAS_CATEGORICAS}
+# Chaves de agregação de cada granularidade: uma linha por dia, por (dia, UF) ou por (dia, município)
+CHAVES_GRANULARIDADE = {
+    "dia": ["data"],
+    "uf": ["data", "uf"],
+    "municipio": ["data", "uf", "municipio"]
+}
+_ESPACOS_JSON = re.compile(r"[\s,]*")
+
+
+def _hash_arquivo(arquivo, tamanho_leitura=1 << 20):
+    """SHA-256 do conteúdo do arquivo, lido em pedaços"""
+    h = hashlib.sha256()
+    with open(arquivo, "rb") as f:
+        for pedaco in iter(lambda: f.read(tamanho_leitura), b""):
+            h.update(pedaco)
+    return h.hexdigest()
+
+
+def _parquet_disponivel():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _registros_json(arquivo, tamanho_leitura=1 << 20):
+    """Itera os objetos de um array JSON lendo o arquivo em pedaços de `tamanho_leitura`"""
+    decoder = json.JSONDecoder()
+    with open(arquivo, "r", encoding="utf-8") as f:
+        buffer = f.read(tamanho_leitura).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{arquivo} não contém um array JSON.")
+        pos = 1
+        while True:
+            pos = _ESPACOS_JSON.match(buffer, pos).end()
+            if buffer.startswith("]", pos):
+                return
+            try:
+                if pos == len(buffer):
+                    raise json.JSONDecodeError("fim do buffer", buffer, pos)
+                registro, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Objeto cortado no fim do buffer: ler mais um pedaço e tentar de novo
+                mais = f.read(tamanho_leitura)
+                if not mais:
+                    raise
+                buffer, pos = buffer[pos:] + mais, 0
+                continue
+            yield registro
+
+
+def _treinar_shard(df, granularidade, feriados_estaduais, prefixo, busca):
+    """Treina e exporta o modelo de uma UF; roda em um processo do joblib"""
+    shard = AccidentPredictor(feriados_estaduais=feriados_estaduais, granularidade=granularidade)
+    X, y = shard._criar_features(df.copy())
+    shard._treinar_features(df, X, y, busca=busca)
+    shard.exportar_modelo(prefixo)
+    return {"linhas": len(df), "r2": float(shard.r2_score), "rmse": float(shard.rmse_score)}
+
+
+def _rmse_fold(params, X, y, tr, val, n_threads=None):
+    """Treina uma combinação de parâmetros em um fold e devolve o RMSE de validação"""
+    X_tr, X_val = X.iloc[tr], X.iloc[val]
+    y_tr, y_val = y.iloc[tr], y.iloc[val]
+
+    m = lgb.LGBMRegressor(**params, random_state=42, verbosity=-1, n_jobs=n_threads)
+    m.fit(X_tr, y_tr, eval_set=[(X_val, y_val)], callbacks=[lgb.early_stopping(50, verbose=False)])
+    y_pred = np.clip(np.round(m.predict(X_val)), 0, None)
+    return np.sqrt(mean_squared_error(y_val, y_pred))
+
 
 class AccidentPredictor:
-    def __init__(self):
+    def __init__(self, feriados_estaduais=False, granularidade="dia"):
+        if granularidade not in CHAVES_GRANULARIDADE:
+            raise ValueError(f"Granularidade desconhecida: {granularidade}")
         self.modelo = lgb.LGBMRegressor(random_state=42)
         self.encoders = {}
+        self._indices_encoders = {}
+        self._posicoes = {}
         self.feature_names = []
         self.treinado = False
         self.best_params = {}
+        self.relatorio_busca = {}
         self.r2_score = None
         self.rmse_score = None
-        self.holidays_br = holidays.Brazil()
+        # Com feriados_estaduais=True, o feriado considera também o calendário da UF da linha
+        self.feriados_estaduais = feriados_estaduais
+        self._calendarios = {}
+        # Uma linha de treino por dia (nacional), por (dia, UF) ou por (dia, município)
+        self.granularidade = granularidade
+        # Floresta achatada em NumPy, usada no lugar do booster quando ativada
+        self._floresta = None
+        # Histórico diário de acidentes para os lags e médias móveis da previsão
+        self.historico = None
+        # Versão do artefato e último dia visto no treino, usados no treino incremental
+        self.versao_modelo = 0
+        self.ultimo_dia_treino = None
+        self.relatorio_incremental = {}
+
+    def __setstate__(self, estado):
+        # Modelos salvos com pickle não trazem os atributos criados depois; os
+        # valores padrão vêm do __init__ e as tabelas de códigos são refeitas.
+        self.__init__()
+        # Calendário nacional de versões antigas, substituído por _calendario_feriados
+        estado.pop("holidays_br", None)
+        self.__dict__.update(estado)
+        self._preparar_indices()
+
+    def _booster(self):
+        """Booster do LightGBM, seja o modelo um LGBMRegressor ou um Booster carregado do formato nativo"""
+        return self.modelo if isinstance(self.modelo, lgb.Booster) else self.modelo.booster_
+
+    def usar_arvores_compiladas(self, ativo=True):
+        """Liga ou desliga a inferência pelas árvores achatadas em NumPy (tree_inference.FlatForest)"""
+        if ativo:
+            from tree_inference import FlatForest
+            self._floresta = FlatForest.from_booster(self._booster())
+        else:
+            self._floresta = None
+
+    def _prever_matriz(self, X):
+        """Previsões brutas para uma matriz de features já na ordem de `feature_names`"""
+        if self._floresta is not None:
+            return self._floresta.predict(X)
+        return self._booster().predict(X)
+
+    def _preparar_indices(self):
+        """Pré-calcula os índices da inferência: categoria → código de cada encoder e feature → coluna"""
+        self._indices_encoders = {col: pd.Index(enc.classes_) for col, enc in self.encoders.items()}
+        self._posicoes = {nome: i for i, nome in enumerate(self.feature_names)}
+
+    def _chaves(self):
+        return CHAVES_GRANULARIDADE[self.granularidade]
+
+    def _regioes(self, ufs, municipios):
+        """Região de cada linha no histórico conforme a granularidade (None no modelo nacional)"""
+        if self.granularidade == "dia":
+            return None
+        ufs = np.asarray(ufs, dtype=object)
+        if self.granularidade == "uf":
+            return ufs
+        # "UF/MUNICIPIO" montado uma vez por par distinto, não por linha
+        codigos, pares = pd.MultiIndex.from_arrays([ufs, np.asarray(municipios, dtype=object)]).factorize()
+        return pd.Categorical.from_codes(codigos, [f"{uf}/{municipio}" for uf, municipio in pares])
 
     def _simplificar_clima(self, cond):
         if any(k in cond for k in ["Chuva", "Garoa"]):
@@ -38,50 +197,255 @@ class AccidentPredictor:
             return "Nevoeiro/Neblina"
         return "Outro"
 
-    def _processar_dados(self, df):
+    def _simplificar_clima_serie(self, serie):
+        """Aplica _simplificar_clima uma vez por categoria distinta e mapeia de volta pelos códigos"""
+        categorias = serie.astype("category")
+        tabela = np.array([self._simplificar_clima(c) for c in categorias.cat.categories], dtype=object)
+        return pd.Series(tabela[categorias.cat.codes.to_numpy()], index=serie.index)
+
+    def _calendario_feriados(self, anos, uf=None):
+        """Datas de feriado dos anos pedidos, nacionais ou nacionais + estaduais da `uf`.
+
+        Cada (uf, ano) é expandido uma única vez pelo `holidays` e guardado como
+        DatetimeIndex ordenado, pronto para um `isin` vetorizado.
+        """
+        datas = []
+        for ano in anos:
+            chave = (uf, int(ano))
+            if chave not in self._calendarios:
+                try:
+                    feriados = holidays.Brazil(subdiv=uf, years=int(ano))
+                except NotImplementedError:
+                    # UF desconhecida: usar apenas os feriados nacionais
+                    feriados = holidays.Brazil(years=int(ano))
+                self._calendarios[chave] = pd.DatetimeIndex(sorted(feriados))
+            datas.append(self._calendarios[chave])
+        if not datas:
+            return pd.DatetimeIndex([])
+        if len(datas) == 1:
+            return datas[0]
+        return datas[0].append(datas[1:]).sort_values()
+
+    def _marcar_feriados(self, df):
+        """Flag 0/1 de feriado para cada linha, sem chamadas Python por linha"""
+        anos = df["data"].dt.year.dropna().unique()
+        if self.feriados_estaduais and "uf" in df.columns:
+            feriado = np.zeros(len(df), dtype=bool)
+            for uf, posicoes in df.groupby("uf", observed=True).indices.items():
+                feriado[posicoes] = df["data"].iloc[posicoes].isin(self._calendario_feriados(anos, uf))
+            return feriado.astype(int)
+        return df["data"].isin(self._calendario_feriados(anos)).astype(int).to_numpy()
+
+    def _moda_por_dia(self, df, col, pesos=None, chaves=("data",)):
+        """Valor mais frequente de `col` em cada dia, equivalente a `x.mode()[0]`.
+
+        Grupos e categorias viram códigos inteiros (ordenados) e só os pares
+        (grupo, categoria) que existem são contados, com `np.unique`. Os pares
+        são ordenados por grupo, contagem decrescente e categoria, e fica o
+        primeiro de cada grupo: empates ficam com o menor valor, como em `mode()`,
+        e a memória acompanha o número de pares e não grupos × categorias.
+        Com `pesos`, cada linha conta como o valor dessa coluna (contagens já agregadas).
+        Com mais de uma coluna em `chaves`, o grupo é a combinação delas (ex.: dia e UF).
+        """
+        codigos, niveis = zip(*(pd.factorize(df[chave], sort=True) for chave in chaves))
+        cod_grupos = np.ravel_multi_index(codigos, [len(nivel) for nivel in niveis])
+        cod_valores, valores = pd.factorize(df[col], sort=True)
+        pares, inverso = np.unique(cod_grupos * len(valores) + cod_valores, return_inverse=True)
+        contagens = np.bincount(inverso, weights=None if pesos is None else df[pesos].to_numpy())
+        grupos, valores_pares = np.divmod(pares, len(valores))
+
+        ordem = np.lexsort((valores_pares, -contagens, grupos))
+        grupos_ordenados = grupos[ordem]
+        primeiros = ordem[np.r_[True, grupos_ordenados[1:] != grupos_ordenados[:-1]]]
+        posicoes = np.unravel_index(grupos[primeiros], [len(nivel) for nivel in niveis])
+        if len(chaves) == 1:
+            indice = pd.Index(niveis[0][posicoes[0]], name=chaves[0])
+        else:
+            indice = pd.MultiIndex.from_arrays([nivel[p] for nivel, p in zip(niveis, posicoes)], names=list(chaves))
+        return pd.Series(np.asarray(valores)[valores_pares[primeiros]], index=indice, name=col)
+
+    def _preparar_bloco(self, df):
+        """Converte datas e horários, filtra a partir de 2019 e simplifica o clima"""
         df["data"] = pd.to_datetime(df["data_inversa"], format="%d/%m/%Y", errors="coerce")
         df = df[df["data"].dt.year >= 2019].dropna(subset=["data", "horario", "uf", "municipio", "tipo_acidente", "condicao_metereologica"])
-        df["hora"] = pd.to_datetime(df["horario"], format="%H:%M:%S", errors="coerce").dt.hour
-        df.dropna(subset=["hora"], inplace=True)
-        df["condicao_metereologica"] = df["condicao_metereologica"].apply(self._simplificar_clima)
-
-        agg = df.groupby("data").agg(
-            acidentes=("data_inversa", "count"),
-            uf=("uf", lambda x: x.mode()[0]),
-            municipio=("municipio", lambda x: x.mode()[0]),
-            tipo_acidente=("tipo_acidente", lambda x: x.mode()[0]),
-            condicao_metereologica=("condicao_metereologica", lambda x: x.mode()[0]), # Manter o nome original
-            hora_media=("hora", "mean")
-        ).reset_index()
-        # Aplicar _simplificar_clima após a agregação para a coluna 'clima'
-        agg["clima"] = agg["condicao_metereologica"].apply(self._simplificar_clima)
-        agg = agg.drop(columns=["condicao_metereologica"]) # Remover a coluna original após simplificação
-
-        return agg.sort_values("data").reset_index(drop=True)
+        df["hora"] = pd.to_datetime(df["horario"], format="%H:%M:%S", errors="coerce").dt.hour.astype("Int8")
+        df = df.dropna(subset=["hora"]).astype({"hora": "int8"})
+        df["condicao_metereologica"] = self._simplificar_clima_serie(df["condicao_metereologica"])
+        # Só as colunas usadas daqui em diante, com os textos como category
+        return df[["data", "hora"] + COLUNAS_MODA].astype({col: "category" for col in COLUNAS_MODA})
+
+    def _agregar_bloco(self, df):
+        """Contagens parciais por dia de um bloco já preparado.
+
+        As contagens de blocos diferentes podem ser somadas (ver _somar_parciais),
+        então a agregação diária não depende de ter o histórico inteiro em memória.
+        """
+        chaves = self._chaves()
+        parcial = {
+            "acidentes": df.groupby(chaves, observed=True).size(),
+            "soma_hora": df.groupby(chaves, observed=True)["hora"].sum()
+        }
+        for col in COLUNAS_MODA:
+            if col not in chaves:
+                parcial[col] = df.groupby(chaves + [col], observed=True).size()
+        return parcial
+
+    def _somar_parciais(self, parciais):
+        somados = {}
+        for chave in parciais[0]:
+            serie = pd.concat([p[chave] for p in parciais])
+            somados[chave] = serie.groupby(level=list(range(serie.index.nlevels)), observed=True).sum()
+        return somados
+
+    def _finalizar_agregacao(self, parcial):
+        chaves = self._chaves()
+        agg = pd.DataFrame({
+            "acidentes": parcial["acidentes"],
+            "hora_media": parcial["soma_hora"] / parcial["acidentes"]
+        })
+        agg.index.names = chaves
+        # Moda diária a partir das contagens (dia, categoria) acumuladas
+        for col in COLUNAS_MODA:
+            if col not in chaves:
+                agg[col] = self._moda_por_dia(parcial[col].rename("n").reset_index(), col, pesos="n", chaves=chaves)
+        # O clima já chega simplificado de _preparar_bloco
+        agg = agg.reset_index().rename(columns={"condicao_metereologica": "clima"})[[
+            "data", "acidentes", "uf", "municipio", "tipo_acidente", "hora_media", "clima"
+        ]]
+
+        agg = agg.astype({"acidentes": "int32"} | {col: "category" for col in COLUNAS_CATEGORICAS})
+        return agg.sort_values(chaves).reset_index(drop=True)
+
+    def _processar_dados(self, df):
+        return self._finalizar_agregacao(self._agregar_bloco(self._preparar_bloco(df)))
+
+    def _ler_blocos(self, arquivo, tamanho_bloco=100_000):
+        """Lê o histórico do DATATRAN em blocos de DataFrame, só com as colunas usadas.
+
+        Aceita os CSVs oficiais (separados por ';', em latin-1), Parquet, NDJSON e
+        arquivos JSON com um array de registros, lidos de forma incremental.
+        """
+        extensao = os.path.splitext(arquivo)[1].lower()
+        if extensao == ".csv":
+            yield from pd.read_csv(arquivo, sep=";", encoding="latin-1", usecols=COLUNAS_DATATRAN,
+                                   dtype=TIPOS_DATATRAN, chunksize=tamanho_bloco)
+            return
+        if extensao == ".parquet":
+            import pyarrow.parquet as pq
+            for lote in pq.ParquetFile(arquivo).iter_batches(batch_size=tamanho_bloco, columns=COLUNAS_DATATRAN):
+                yield lote.to_pandas()
+            return
+
+        with open(arquivo, "r", encoding="utf-8") as f:
+            inicio = f.read(64).lstrip()
+        if extensao in (".ndjson", ".jsonl") or not inicio.startswith("["):
+            for bloco in pd.read_json(arquivo, lines=True, dtype=False, chunksize=tamanho_bloco):
+                yield bloco.reindex(columns=COLUNAS_DATATRAN)
+            return
+
+        registros = []
+        for registro in _registros_json(arquivo):
+            registros.append([registro.get(col) for col in COLUNAS_DATATRAN])
+            if len(registros) == tamanho_bloco:
+                yield pd.DataFrame(registros, columns=COLUNAS_DATATRAN)
+                registros = []
+        if registros:
+            yield pd.DataFrame(registros, columns=COLUNAS_DATATRAN)
+
+    def _carregar_dados(self, arquivo, tamanho_bloco=100_000):
+        """Agrega o arquivo por dia bloco a bloco, com memória limitada ao número de dias"""
+        parciais = []
+        for bloco in self._ler_blocos(arquivo, tamanho_bloco):
+            parciais.append(self._agregar_bloco(self._preparar_bloco(bloco)))
+            if len(parciais) >= 16:
+                parciais = [self._somar_parciais(parciais)]
+        if not parciais:
+            raise ValueError("Erro: arquivo sem registros.")
+        return self._finalizar_agregacao(self._somar_parciais(parciais))
+
+    def _carregar_features(self, arquivo, tamanho_bloco=100_000, cache=".cache_features"):
+        """Dados agregados e matriz de features do arquivo, com cache em Parquet.
+
+        Cada arquivo e combinação de opções que mudam as features (granularidade,
+        feriados estaduais) tem sua entrada, `{nome}-{opções}-{chave}`, em que a
+        chave é o hash do conteúdo com VERSAO_FEATURES. Uma chave nova apaga só
+        as entradas antigas com o mesmo nome e as mesmas opções. Com cache=None
+        (ou sem o pyarrow instalado) tudo é recalculado.
+        """
+        if cache is None or not _parquet_disponivel():
+            df = self._carregar_dados(arquivo, tamanho_bloco)
+            X, y = self._criar_features(df.copy())
+            return df, X, y
+
+        nome = os.path.splitext(os.path.basename(arquivo))[0]
+        opcoes = hashlib.sha256(f"{self.feriados_estaduais}:{self.granularidade}".encode()).hexdigest()[:8]
+        chave = hashlib.sha256(f"{_hash_arquivo(arquivo)}:{VERSAO_FEATURES}".encode()).hexdigest()[:16]
+        base = os.path.join(cache, f"{nome}-{opcoes}-{chave}")
+
+        if os.path.exists(base + ".features.parquet"):
+            df = pd.read_parquet(base + ".dados.parquet")
+            features = pd.read_parquet(base + ".features.parquet")
+            # Os encoders são refeitos a partir dos dados agregados (ou mantidos, se o
+            # modelo já os tem) e os códigos saem deles, sem recalcular as features
+            for col in COLUNAS_CATEGORICAS:
+                if col not in self.encoders:
+                    self.encoders[col] = LabelEncoder().fit(df[col])
+            self._preparar_indices()
+            print(f"Features carregadas do cache: {base}")
+            return df, self._recodificar(df, features.drop(columns=["acidentes"])), features["acidentes"]
+
+        df = self._carregar_dados(arquivo, tamanho_bloco)
+        X, y = self._criar_features(df.copy())
+
+        os.makedirs(cache, exist_ok=True)
+        # Só entradas deste arquivo com estas opções; "datatran" não casa com "datatran-2024"
+        padrao = re.compile(rf"{re.escape(nome)}-{opcoes}-[0-9a-f]{{16}}\.(dados|features)\.parquet")
+        for antigo in os.listdir(cache):
+            if padrao.fullmatch(antigo):
+                os.remove(os.path.join(cache, antigo))
+        df.to_parquet(base + ".dados.parquet", index=False)
+        # Sem os códigos das categorias: eles dependem dos encoders de quem lê a entrada
+        X.drop(columns=[f"{col}_enc" for col in COLUNAS_CATEGORICAS]).assign(acidentes=y).to_parquet(
+            base + ".features.parquet", index=False
+        )
+        return df, X, y
 
     def _criar_features(self, df):
-        df["ano"] = df["data"].dt.year
-        df["mes"] = df["data"].dt.month
-        df["dia_semana"] = df["data"].dt.dayofweek
-        df["dia_ano"] = df["data"].dt.dayofyear
-        df["semana"] = df["data"].dt.isocalendar().week.astype(int)
-        df["fim_semana"] = (df["dia_semana"] >= 5).astype(int)
-        df["feriado"] = df["data"].apply(lambda x: int(x in self.holidays_br))
+        # Cada feature já nasce no tipo do plano, para não acumular colunas int64/float64
+        tipos = TIPOS_FEATURES
+        df["ano"] = df["data"].dt.year.astype(tipos["ano"])
+        df["mes"] = df["data"].dt.month.astype(tipos["mes"])
+        df["dia_semana"] = df["data"].dt.dayofweek.astype(tipos["dia_semana"])
+        df["dia_ano"] = df["data"].dt.dayofyear.astype(tipos["dia_ano"])
+        df["semana"] = df["data"].dt.isocalendar().week.astype(tipos["semana"])
+        df["fim_semana"] = (df["dia_semana"] >= 5).astype(tipos["fim_semana"])
+        df["feriado"] = self._marcar_feriados(df).astype(tipos["feriado"])
         df["feriado_fim_semana"] = df["feriado"] * df["fim_semana"]
 
-        df["dia_semana_sin"] = np.sin(2 * np.pi * df["dia_semana"] / 7)
-        df["dia_semana_cos"] = np.cos(2 * np.pi * df["dia_semana"] / 7)
-        df["dia_ano_sin"] = np.sin(2 * np.pi * df["dia_ano"] / 365.25)
-        df["dia_ano_cos"] = np.cos(2 * np.pi * df["dia_ano"] / 365.25)
+        df["dia_semana_sin"] = np.sin(2 * np.pi * df["dia_semana"] / 7).astype(tipos["dia_semana_sin"])
+        df["dia_semana_cos"] = np.cos(2 * np.pi * df["dia_semana"] / 7).astype(tipos["dia_semana_cos"])
+        df["dia_ano_sin"] = np.sin(2 * np.pi * df["dia_ano"] / 365.25).astype(tipos["dia_ano_sin"])
+        df["dia_ano_cos"] = np.cos(2 * np.pi * df["dia_ano"] / 365.25).astype(tipos["dia_ano_cos"])
 
         # Lags e médias móveis só fazem sentido se houver a coluna 'acidentes'
-        # Durante a previsão, df_processado terá 'acidentes' = 0, então estas features serão 0
-        if 'acidentes' in df.columns:
+        # Durante a previsão elas vêm do histórico (ou ficam em 0 sem histórico)
+        if 'acidentes' in df.columns and self.granularidade == "dia":
             for lag in [1, 2, 7, 14]:
                 df[f"lag_{lag}"] = df["acidentes"].shift(lag)
             for w in [7, 14, 28]:
                 df[f"media_{w}"] = df["acidentes"].shift(1).rolling(w, min_periods=1).mean()
                 df[f"std_{w}"] = df["acidentes"].shift(1).rolling(w, min_periods=1).std()
+        elif 'acidentes' in df.columns:
+            # Por região, dias sem acidente não têm linha: os lags seguem o calendário
+            # (dia ausente = 0 acidentes), igual ao histórico usado na previsão
+            regioes = self._regioes(df["uf"], df["municipio"])
+            historico = FeatureStore().adicionar(df["data"], df["acidentes"], regioes)
+            for nome, valores in historico.features(df["data"], regioes, dtype=np.float32).items():
+                df[nome] = valores
+        elif self.historico is not None:
+            regioes = self._regioes(df["uf"], df["municipio"]) if "uf" in df.columns else None
+            for nome, valores in self.historico.features(df["data"], regioes, dtype=np.float32).items():
+                df[nome] = valores
         else:
             for lag in [1, 2, 7, 14]:
                 df[f"lag_{lag}"] = 0
@@ -91,16 +455,17 @@ class AccidentPredictor:
 
         df.fillna(0, inplace=True)
 
-        for col in ["uf", "municipio", "tipo_acidente", "clima"]:
+        for col in COLUNAS_CATEGORICAS:
             if col in df.columns:
                 if col in self.encoders:
-                    enc = self.encoders[col]
-                    df.loc[:, f"{col}_enc"] = df[col].apply(lambda x: enc.transform([x])[0] if x in enc.classes_ else -1)
+                    # get_indexer devolve -1 para categorias desconhecidas
+                    df.loc[:, f"{col}_enc"] = self._indices_encoders[col].get_indexer(df[col]).astype(tipos[f"{col}_enc"])
                 else:
                     # Isso só deve acontecer durante o treinamento inicial
                     enc = LabelEncoder()
-                    df.loc[:, f"{col}_enc"] = enc.fit_transform(df[col])
+                    df.loc[:, f"{col}_enc"] = enc.fit_transform(df[col]).astype(tipos[f"{col}_enc"])
                     self.encoders[col] = enc
+                    self._indices_encoders[col] = pd.Index(enc.classes_)
             else:
                 # Se a coluna não estiver presente no df, mas o encoder existir (modo de previsão),
                 # preencher com um valor padrão (e.g., -1 para 'desconhecido')
@@ -117,44 +482,86 @@ class AccidentPredictor:
         ] + [f"lag_{i}" for i in [1, 2, 7, 14]] + \
             [f"media_{i}" for i in [7, 14, 28]] + \
             [f"std_{i}" for i in [7, 14, 28]] + \
-            [f"{c}_enc" for c in ["uf", "municipio", "tipo_acidente", "clima"]]
+            [f"{c}_enc" for c in COLUNAS_CATEGORICAS]
 
         y = df["acidentes"] if "acidentes" in df.columns else None
-        return df[features], y
-
-    def _otimizar_parametros(self, X, y, grid):
+        return df[features].astype({nome: TIPOS_FEATURES[nome] for nome in features}), y
+
+    def _avaliar_combos(self, X, y, combos, folds, n_jobs=1):
+        """Matriz de RMSE (combinação × fold) com os ajustes distribuídos entre processos"""
+        # Cada par (combinação, fold) é uma tarefa independente. Em paralelo, as
+        # threads do LightGBM são divididas entre os processos para não disputar núcleos.
+        n_threads = None if n_jobs == 1 else max(1, (os.cpu_count() or 1) // effective_n_jobs(n_jobs))
+        rmses = Parallel(n_jobs=n_jobs)(
+            delayed(_rmse_fold)(params, X, y, tr, val, n_threads)
+            for params in combos for tr, val in folds
+        )
+        return np.asarray(rmses).reshape(len(combos), len(folds))
+
+    def _otimizar_parametros(self, X, y, grid, n_jobs=1):
         tscv = TimeSeriesSplit(n_splits=5)
-        best_rmse, best = np.inf, None
-
-        for combo in itertools.product(*grid.values()):
-            params = dict(zip(grid.keys(), combo))
-            rmses = []
-            for tr, val in tscv.split(X):
-                X_tr, X_val = X.iloc[tr], X.iloc[val]
-                y_tr, y_val = y.iloc[tr], y.iloc[val]
-
-                m = lgb.LGBMRegressor(**params, random_state=42, verbosity=-1)
-                m.fit(X_tr, y_tr, eval_set=[(X_val, y_val)], callbacks=[lgb.early_stopping(50, verbose=False)])
-                y_pred = np.clip(np.round(m.predict(X_val)), 0, None)
-                rmses.append(np.sqrt(mean_squared_error(y_val, y_pred)))
-
-            mean_rmse = np.mean(rmses)
-            if mean_rmse < best_rmse:
-                best_rmse, best = mean_rmse, params
+        folds = list(tscv.split(X))
+        combos = [dict(zip(grid.keys(), combo)) for combo in itertools.product(*grid.values())]
+
+        # argmin devolve a primeira combinação de menor RMSE médio, como o laço serial
+        medias = self._avaliar_combos(X, y, combos, folds, n_jobs).mean(axis=1)
+        self.relatorio_busca = {
+            "estrategia": "grade",
+            "combinacoes": len(combos),
+            "ajustes": len(combos) * len(folds),
+            "ajustes_grade": len(combos) * len(folds),
+            "rmse_validacao": float(medias.min())
+        }
+        return combos[int(np.argmin(medias))]
 
-        return best
+    def _busca_sucessiva(self, X, y, grid, n_jobs=1, eta=3):
+        """Successive halving sobre os folds do TimeSeriesSplit.
 
-    def treinar(self, arquivo_json):
-        with open(arquivo_json, "r", encoding="utf-8") as f:
-            df = pd.DataFrame(json.load(f))
+        Todas as combinações são avaliadas no primeiro fold; depois de cada fold
+        só seguem as 1/eta melhores pelo RMSE médio acumulado, até restar uma
+        combinação ou acabarem os folds.
+        """
+        tscv = TimeSeriesSplit(n_splits=5)
+        folds = list(tscv.split(X))
+        combos = [dict(zip(grid.keys(), combo)) for combo in itertools.product(*grid.values())]
+
+        rmses = np.full((len(combos), len(folds)), np.nan)
+        vivos = np.arange(len(combos))
+        for i, fold in enumerate(folds):
+            rmses[vivos, i] = self._avaliar_combos(X, y, [combos[c] for c in vivos], [fold], n_jobs)[:, 0]
+            if len(vivos) == 1:
+                break
+            if i < len(folds) - 1:
+                # Ordenação estável: empates ficam com a combinação que vem antes na grade
+                medias = rmses[vivos, :i + 1].mean(axis=1)
+                vivos = vivos[np.argsort(medias, kind="stable")[:int(np.ceil(len(vivos) / eta))]]
+
+        medias = np.nanmean(rmses[vivos], axis=1)
+        ajustes = int(np.count_nonzero(~np.isnan(rmses)))
+        self.relatorio_busca = {
+            "estrategia": "sucessiva",
+            "combinacoes": len(combos),
+            "ajustes": ajustes,
+            "ajustes_grade": len(combos) * len(folds),
+            "rmse_validacao": float(medias.min())
+        }
+        return combos[int(vivos[np.argmin(medias)])]
 
-        df = self._processar_dados(df)
-        X, y = self._criar_features(df)
+    def treinar(self, arquivo_json, n_jobs=1, busca="grade", tamanho_bloco=100_000, cache=".cache_features"):
+        df, X, y = self._carregar_features(arquivo_json, tamanho_bloco, cache)
+        self._treinar_features(df, X, y, n_jobs=n_jobs, busca=busca)
 
+    def _treinar_features(self, df, X, y, n_jobs=1, busca="grade"):
+        """Busca de parâmetros e ajuste final sobre dados agregados e features já calculados"""
         if X.empty:
             raise ValueError("Erro: DataFrame vazio após processamento.")
 
+        # O histórico usado na previsão começa com as contagens do treino
+        self.historico = FeatureStore().adicionar(df["data"], df["acidentes"], self._regioes(df["uf"], df["municipio"]))
+        self.ultimo_dia_treino = df["data"].max()
+
         self.feature_names = X.columns.tolist()
+        self._preparar_indices()
         grid = {
             "n_estimators": [100, 200],
             "learning_rate": [0.05, 0.1],
@@ -162,7 +569,24 @@ class AccidentPredictor:
             "max_depth": [-1, 10]
         }
 
-        self.best_params = self._otimizar_parametros(X, y, grid)
+        if busca == "grade":
+            self.best_params = self._otimizar_parametros(X, y, grid, n_jobs=n_jobs)
+        elif busca == "sucessiva":
+            # A poda permite explorar também feature_fraction e lambda_l2
+            # (colsample_bytree e reg_lambda no wrapper do scikit-learn)
+            grid.update({
+                "min_child_samples": [10, 20, 40],
+                "colsample_bytree": [0.8, 1.0],
+                "reg_lambda": [0.0, 1.0]
+            })
+            self.best_params = self._busca_sucessiva(X, y, grid, n_jobs=n_jobs)
+        else:
+            raise ValueError(f"Estratégia de busca desconhecida: {busca}")
+
+        r = self.relatorio_busca
+        print(f"Busca '{r['estrategia']}': {r['ajustes']} de {r['ajustes_grade']} ajustes "
+              f"({r['ajustes_grade'] - r['ajustes']} economizados em {r['combinacoes']} combinações)")
+
         self.modelo = lgb.LGBMRegressor(**self.best_params, random_state=42)
         self.modelo.fit(X, y)
 
@@ -170,9 +594,109 @@ class AccidentPredictor:
         self.r2_score = r2_score(y, y_pred)
         self.rmse_score = np.sqrt(mean_squared_error(y, y_pred))
         self.treinado = True
+        self.versao_modelo += 1
+        if self._floresta is not None:
+            self.usar_arvores_compiladas()
 
         print(f"Treinamento concluído | R²: {self.r2_score:.4f} | RMSE: {self.rmse_score:.2f}")
 
+    def _recodificar(self, df, X):
+        """Códigos das categorias de `df` pelos encoders do modelo atual, nas últimas colunas de X"""
+        return X.assign(**{
+            f"{col}_enc": self._indices_encoders[col].get_indexer(df[col]).astype(TIPOS_FEATURES[f"{col}_enc"])
+            for col in COLUNAS_CATEGORICAS
+        })
+
+    def treinar_incremental(self, arquivo_json, novas_arvores=50, limiar_drift=0.25, min_dias=7,
+                            n_jobs=1, tamanho_bloco=100_000, cache=".cache_features", prefixo=None):
+        """Continua o boosting do modelo atual com os dias novos do arquivo.
+
+        Os dias posteriores a `ultimo_dia_treino` recebem `novas_arvores` árvores
+        a mais (init_model), com os parâmetros da última busca e as features do
+        cache. Se o RMSE do modelo atual nesses dias passar de
+        (1 + limiar_drift) × o RMSE de validação cruzada da última busca, há
+        drift e o modelo é retreinado do zero com a busca completa. Com `prefixo`, o resultado é exportado como
+        `{prefixo}-v{versao}` e promovido a `{prefixo}`. Devolve o relatório,
+        também guardado em `relatorio_incremental`.
+        """
+        if not self.treinado or self.ultimo_dia_treino is None or not self.best_params:
+            raise RuntimeError("Treine o modelo completo antes do treino incremental.")
+
+        inicio = time.perf_counter()
+        df, X, y = self._carregar_features(arquivo_json, tamanho_bloco, cache)
+
+        novos = (df["data"] > self.ultimo_dia_treino).to_numpy()
+        relatorio = {"versao_base": self.versao_modelo, "dias_novos": int(novos.sum())}
+        if relatorio["dias_novos"] < min_dias:
+            print(f"Treino incremental ignorado: {relatorio['dias_novos']} dia(s) novo(s), mínimo {min_dias}")
+            return relatorio
+
+        X_novos, y_novos = X[novos], y[novos]
+        rmse_antes = np.sqrt(mean_squared_error(y_novos, np.clip(np.round(self._prever_matriz(X_novos.to_numpy())), 0, None)))
+        # O RMSE no próprio treino é otimista; a referência é o da validação cruzada, quando existe
+        referencia = self.relatorio_busca.get("rmse_validacao", self.rmse_score)
+        relatorio.update({"rmse_novos_antes": rmse_antes, "drift": bool(rmse_antes > (1 + limiar_drift) * referencia)})
+
+        if relatorio["drift"]:
+            print(f"Drift detectado (RMSE {rmse_antes:.2f} contra {referencia:.2f} na validação): retreinando do zero")
+            # Encoders refeitos com as categorias novas; o treino e a previsão usam os mesmos códigos
+            self.encoders = {col: LabelEncoder().fit(df[col]) for col in COLUNAS_CATEGORICAS}
+            self._preparar_indices()
+            X = self._recodificar(df, X)
+            self._treinar_features(df, X, y, n_jobs=n_jobs)
+            X_novos = X[novos]
+        else:
+            params = {**self.best_params, "n_estimators": novas_arvores}
+            modelo = lgb.LGBMRegressor(**params, random_state=42)
+            modelo.fit(X_novos, y_novos, init_model=self._booster())
+            self.modelo = modelo
+            self.historico.adicionar(
+                df["data"][novos], df["acidentes"][novos], self._regioes(df["uf"][novos], df["municipio"][novos])
+            )
+            self.ultimo_dia_treino = df["data"].max()
+            y_pred = np.clip(np.round(self.modelo.predict(X)), 0, None)
+            self.r2_score = r2_score(y, y_pred)
+            self.rmse_score = np.sqrt(mean_squared_error(y, y_pred))
+            self.versao_modelo += 1
+            if self._floresta is not None:
+                self.usar_arvores_compiladas()
+
+        relatorio.update({
+            "estrategia": "completo" if relatorio["drift"] else "incremental",
+            "versao": self.versao_modelo,
+            "rmse_novos_depois": np.sqrt(mean_squared_error(
+                y_novos, np.clip(np.round(self._prever_matriz(X_novos.to_numpy())), 0, None)
+            )),
+            "r2": self.r2_score,
+            "rmse": self.rmse_score,
+            "tempo": time.perf_counter() - inicio
+        })
+        self.relatorio_incremental = relatorio
+        print(f"Treino {relatorio['estrategia']} v{relatorio['versao']} em {relatorio['tempo']:.1f}s | "
+              f"RMSE nos {relatorio['dias_novos']} dias novos: {relatorio['rmse_novos_antes']:.2f} → "
+              f"{relatorio['rmse_novos_depois']:.2f} | R²: {self.r2_score:.4f} | RMSE: {self.rmse_score:.2f}")
+
+        if prefixo is not None:
+            self.exportar_modelo(f"{prefixo}-v{self.versao_modelo}")
+            self.exportar_modelo(prefixo)
+        return relatorio
+
+    def atualizar_historico(self, df_novos_dados, caminho=None):
+        """Acrescenta ao histórico as contagens diárias de novos registros do DATATRAN.
+
+        Os registros devem cobrir dias completos: a contagem de cada dia presente
+        substitui a anterior. Com `caminho`, o histórico é gravado em seguida.
+        """
+        contagens = self._preparar_bloco(df_novos_dados.copy()).groupby(self._chaves(), observed=True).size().reset_index(name="n")
+        if self.historico is None:
+            self.historico = FeatureStore()
+        self.historico.adicionar(
+            contagens["data"], contagens["n"], self._regioes(contagens.get("uf"), contagens.get("municipio"))
+        )
+        if caminho is not None:
+            self.historico.salvar(caminho)
+        return len(contagens)
+
     def prever(self, df_novos_dados):
         if not self.treinado:
             raise RuntimeError("Treine o modelo antes de fazer previsões.")
@@ -188,7 +712,10 @@ class AccidentPredictor:
         # A solução é garantir que _criar_features possa lidar com a ausência de 'acidentes'
         # e que os encoders sejam aplicados corretamente.
 
-        X_prever, _ = self._criar_features(df_processado)
+        # Com histórico, os lags vêm dele e não das contagens das próprias consultas
+        X_prever, _ = self._criar_features(
+            df_processado if self.historico is None else df_processado.drop(columns="acidentes")
+        )
 
         # Garantir que as colunas de previsão correspondam às colunas de treinamento
         missing_cols = set(self.feature_names) - set(X_prever.columns)
@@ -198,7 +725,142 @@ class AccidentPredictor:
 
         previsoes = np.clip(np.round(self.modelo.predict(X_prever)), 0, None)
         df_processado["previsoes_acidentes"] = previsoes
-        return df_processado[["data", "previsoes_acidentes"]]
+        return df_processado[self._chaves() + ["previsoes_acidentes"]]
+
+    def prever_rapido(self, data, hora, uf, municipio, condicao, tipo_acidente=None):
+        """Previsão de uma única consulta, sem pandas.
+
+        Monta o vetor de features direto em um array NumPy, na ordem de
+        `feature_names`, e chama o booster do LightGBM. O resultado é o mesmo de
+        `prever` para um DataFrame de uma linha; `tipo_acidente=None` é tratado
+        como categoria desconhecida.
+        """
+        if not self.treinado:
+            raise RuntimeError("Treine o modelo antes de fazer previsões.")
+
+        linha = np.zeros((1, len(self.feature_names)), dtype=np.float32)
+        pos = self._posicoes
+        dia_semana = data.weekday()
+        dia_ano = data.timetuple().tm_yday
+        fim_semana = int(dia_semana >= 5)
+        calendario = self._calendario_feriados([data.year], uf if self.feriados_estaduais else None)
+        feriado = int(pd.Timestamp(data.year, data.month, data.day) in calendario)
+
+        valores = {
+            "ano": data.year,
+            "mes": data.month,
+            "dia_semana": dia_semana,
+            "dia_ano": dia_ano,
+            "semana": data.isocalendar()[1],
+            "fim_semana": fim_semana,
+            "dia_semana_sin": np.sin(2 * np.pi * dia_semana / 7),
+            "dia_semana_cos": np.cos(2 * np.pi * dia_semana / 7),
+            "dia_ano_sin": np.sin(2 * np.pi * dia_ano / 365.25),
+            "dia_ano_cos": np.cos(2 * np.pi * dia_ano / 365.25),
+            "hora_media": hora,
+            "feriado": feriado,
+            "feriado_fim_semana": feriado * fim_semana
+        }
+        categorias = {
+            "uf": uf,
+            "municipio": municipio,
+            "tipo_acidente": tipo_acidente,
+            "clima": self._simplificar_clima(condicao)
+        }
+        for col, valor in categorias.items():
+            indice = self._indices_encoders.get(col)
+            valores[f"{col}_enc"] = indice.get_loc(valor) if indice is not None and valor in indice else -1
+
+        # Lags e médias móveis vêm do histórico, como em prever (0 sem histórico)
+        if self.historico is not None:
+            regiao = {"dia": REGIAO_TOTAL, "uf": uf, "municipio": f"{uf}/{municipio}"}[self.granularidade]
+            valores.update(self.historico.features_dia(data.strftime("%Y-%m-%d"), regiao))
+        for nome, valor in valores.items():
+            if nome in pos:
+                linha[0, pos[nome]] = valor
+
+        return float(np.clip(np.round(self._prever_matriz(linha)), 0, None)[0])
+
+    def _matriz_lote(self, dias, horas, ufs, municipios, condicoes, tipos_acidente):
+        """Matriz de features de um bloco de consultas, na ordem de `feature_names`.
+
+        As features de calendário são calculadas uma vez por dia distinto e
+        espalhadas pelas linhas; as categorias são codificadas com get_indexer.
+        """
+        X = np.zeros((len(horas), len(self.feature_names)), dtype=np.float32)
+        pos = self._posicoes
+
+        unicos, inverso = np.unique(dias, return_inverse=True)
+        calendario = pd.DatetimeIndex(unicos)
+        dia_semana = calendario.dayofweek.to_numpy()
+        dia_ano = calendario.dayofyear.to_numpy()
+        fim_semana = (dia_semana >= 5).astype(int)
+        if self.feriados_estaduais:
+            feriado = self._marcar_feriados(pd.DataFrame({"data": calendario[inverso], "uf": ufs}))
+        else:
+            feriado = calendario.isin(self._calendario_feriados(calendario.year.unique())).astype(int)[inverso]
+
+        colunas = {
+            "ano": calendario.year.to_numpy()[inverso],
+            "mes": calendario.month.to_numpy()[inverso],
+            "dia_semana": dia_semana[inverso],
+            "dia_ano": dia_ano[inverso],
+            "semana": calendario.isocalendar().week.to_numpy().astype(int)[inverso],
+            "fim_semana": fim_semana[inverso],
+            "dia_semana_sin": np.sin(2 * np.pi * dia_semana / 7)[inverso],
+            "dia_semana_cos": np.cos(2 * np.pi * dia_semana / 7)[inverso],
+            "dia_ano_sin": np.sin(2 * np.pi * dia_ano / 365.25)[inverso],
+            "dia_ano_cos": np.cos(2 * np.pi * dia_ano / 365.25)[inverso],
+            "hora_media": horas,
+            "feriado": feriado,
+            "feriado_fim_semana": feriado * fim_semana[inverso]
+        }
+        categorias = {
+            "uf": ufs,
+            "municipio": municipios,
+            "tipo_acidente": tipos_acidente,
+            "clima": self._simplificar_clima_serie(pd.Series(condicoes)).to_numpy()
+        }
+        for col, valores in categorias.items():
+            indice = self._indices_encoders.get(col)
+            colunas[f"{col}_enc"] = -1 if indice is None or valores is None else indice.get_indexer(valores)
+
+        # Lags e médias móveis vêm do histórico; no modelo nacional, uma vez por dia distinto
+        if self.historico is not None and self.granularidade == "dia":
+            colunas.update({nome: v[inverso] for nome, v in self.historico.features(unicos).items()})
+        elif self.historico is not None:
+            colunas.update(self.historico.features(dias, self._regioes(ufs, municipios)))
+        for nome, valores in colunas.items():
+            if nome in pos:
+                X[:, pos[nome]] = valores
+        return X
+
+    def prever_lote(self, datas, horas, ufs, municipios, condicoes, tipos_acidente=None, tamanho_bloco=100_000):
+        """Previsões vetorizadas para muitas consultas (data, hora, uf, município, clima).
+
+        As entradas são arrays do mesmo tamanho; a matriz de features é montada
+        e pontuada em blocos de `tamanho_bloco` linhas, então a memória extra não
+        cresce com o total. Devolve um array float32 com o mesmo resultado de
+        prever_rapido para cada linha.
+        """
+        if not self.treinado:
+            raise RuntimeError("Treine o modelo antes de fazer previsões.")
+
+        dias = pd.to_datetime(np.asarray(datas)).to_numpy().astype("datetime64[D]")
+        horas = np.asarray(horas)
+        ufs, municipios, condicoes = np.asarray(ufs, dtype=object), np.asarray(municipios, dtype=object), np.asarray(condicoes, dtype=object)
+        if tipos_acidente is not None:
+            tipos_acidente = np.asarray(tipos_acidente, dtype=object)
+
+        previsoes = np.empty(len(horas), dtype=np.float32)
+        for inicio in range(0, len(horas), tamanho_bloco):
+            bloco = slice(inicio, inicio + tamanho_bloco)
+            X = self._matriz_lote(
+                dias[bloco], horas[bloco], ufs[bloco], municipios[bloco], condicoes[bloco],
+                None if tipos_acidente is None else tipos_acidente[bloco]
+            )
+            previsoes[bloco] = np.clip(np.round(self._prever_matriz(X)), 0, None)
+        return previsoes
 
     def salvar_modelo(self, nome="modelo_acidentes.pkl"):
         if not self.treinado:
@@ -215,8 +877,118 @@ class AccidentPredictor:
             }, f)
         print(f"Modelo salvo: {nome}")
 
+    def exportar_modelo(self, prefixo="modelo_acidentes"):
+        """Salva o modelo no formato nativo: `{prefixo}.txt` e `{prefixo}.json`.
+
+        O .txt é o booster no formato texto do LightGBM; o .json guarda as
+        classes dos encoders, as features, os parâmetros e as métricas. Nenhum
+        dos dois depende de pickle, e carregá-los não executa código. O histórico
+        das features de lag vai para `{prefixo}.historico.npz`.
+        """
+        if not self.treinado:
+            raise RuntimeError("Treine o modelo antes de salvar.")
+
+        # O hash do booster vai nos metadados: um .txt e um .json de exportações
+        # diferentes (lidos entre os dois os.replace) são recusados em carregar_modelo
+        self._booster().save_model(f"{prefixo}.txt.tmp")
+        metadados = {
+            "versao_formato": 1,
+            "versao_features": VERSAO_FEATURES,
+            "encoders": {col: enc.classes_.tolist() for col, enc in self.encoders.items()},
+            "features": self.feature_names,
+            "params": self.best_params,
+            "busca": self.relatorio_busca,
+            "r2": None if self.r2_score is None else float(self.r2_score),
+            "rmse": None if self.rmse_score is None else float(self.rmse_score),
+            "feriados_estaduais": self.feriados_estaduais,
+            "granularidade": self.granularidade,
+            "versao_modelo": self.versao_modelo,
+            "ultimo_dia_treino": None if self.ultimo_dia_treino is None else str(pd.Timestamp(self.ultimo_dia_treino).date()),
+            "booster_sha256": _hash_arquivo(f"{prefixo}.txt.tmp")
+        }
+        # Booster primeiro e metadados por último, cada um trocado de uma vez com os.replace
+        with open(f"{prefixo}.json.tmp", "w", encoding="utf-8") as f:
+            json.dump(metadados, f, ensure_ascii=False, indent=2)
+        if self.historico is not None:
+            self.historico.salvar(f"{prefixo}.historico.npz")
+        os.replace(f"{prefixo}.txt.tmp", f"{prefixo}.txt")
+        os.replace(f"{prefixo}.json.tmp", f"{prefixo}.json")
+        print(f"Modelo exportado: {prefixo}.txt / {prefixo}.json")
+
+    @classmethod
+    def carregar_modelo(cls, prefixo="modelo_acidentes"):
+        """Carrega um modelo salvo por exportar_modelo
+
+        Levanta ValueError se o .txt não é o booster da mesma exportação do .json.
+        """
+        with open(f"{prefixo}.json", "r", encoding="utf-8") as f:
+            metadados = json.load(f)
+        with open(f"{prefixo}.txt", "rb") as f:
+            booster = f.read()
+        # Artefatos exportados antes do hash não têm o campo
+        esperado = metadados.get("booster_sha256")
+        if esperado is not None and hashlib.sha256(booster).hexdigest() != esperado:
+            raise ValueError(f"{prefixo}.txt e {prefixo}.json são de exportações diferentes.")
+
+        predictor = cls(
+            feriados_estaduais=metadados["feriados_estaduais"],
+            granularidade=metadados.get("granularidade", "dia")
+        )
+        predictor.modelo = lgb.Booster(model_str=booster.decode("utf-8"))
+        for col, classes in metadados["encoders"].items():
+            enc = LabelEncoder()
+            enc.classes_ = np.array(classes, dtype=object)
+            predictor.encoders[col] = enc
+        predictor.feature_names = metadados["features"]
+        predictor.best_params = metadados["params"]
+        predictor.relatorio_busca = metadados.get("busca", {})
+        predictor.r2_score = metadados["r2"]
+        predictor.rmse_score = metadados["rmse"]
+        # Campos ausentes em artefatos exportados antes do treino incremental
+        predictor.versao_modelo = metadados.get("versao_modelo", 0)
+        if metadados.get("ultimo_dia_treino"):
+            predictor.ultimo_dia_treino = pd.Timestamp(metadados["ultimo_dia_treino"])
+        predictor.treinado = True
+        predictor._preparar_indices()
+        if os.path.exists(f"{prefixo}.historico.npz"):
+            predictor.historico = FeatureStore.abrir(f"{prefixo}.historico.npz")
+        return predictor
+
+    @classmethod
+    def treinar_por_uf(cls, arquivo_json, diretorio="modelos_uf", granularidade="municipio", n_jobs=1,
+                       busca="grade", min_linhas=100, tamanho_bloco=100_000, feriados_estaduais=False):
+        """Treina um modelo por UF (shard) e grava os artefatos em `diretorio`.
+
+        O arquivo é agregado uma única vez na granularidade pedida ("uf" ou
+        "municipio") e dividido por UF; cada shard passa pela busca e pelo
+        ajuste em um processo do joblib e é exportado como `modelo_{UF}`. UFs
+        com menos de `min_linhas` linhas agregadas ficam sem shard e caem no
+        modelo nacional. O índice dos shards vai para `{diretorio}/indice.json`.
+        """
+        if granularidade == "dia":
+            raise ValueError("Shards por UF precisam da granularidade 'uf' ou 'municipio'.")
+
+        df = cls(feriados_estaduais=feriados_estaduais, granularidade=granularidade)._carregar_dados(arquivo_json, tamanho_bloco)
+        shards = {uf: parte.reset_index(drop=True) for uf, parte in df.groupby("uf", observed=True) if len(parte) >= min_linhas}
+        os.makedirs(diretorio, exist_ok=True)
+        resultados = Parallel(n_jobs=n_jobs)(
+            delayed(_treinar_shard)(parte, granularidade, feriados_estaduais, os.path.join(diretorio, f"modelo_{uf}"), busca)
+            for uf, parte in shards.items()
+        )
+
+        indice = {
+            "granularidade": granularidade,
+            "shards": {uf: {"prefixo": f"modelo_{uf}", **resultado} for uf, resultado in zip(shards, resultados)}
+        }
+        caminho = os.path.join(diretorio, "indice.json")
+        with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(indice, f, ensure_ascii=False, indent=2)
+        os.replace(caminho + ".tmp", caminho)
+        print(f"{len(shards)} shard(s) treinado(s) em {diretorio} ({df['uf'].nunique() - len(shards)} UF(s) sem dados suficientes)")
+        return indice
+
 
 if __name__ == "__main__":
     predictor = AccidentPredictor()
-    predictor.treinar("datatran_consolidado.json")
-    predictor.salvar_modelo()
\ No newline at end of file
+    predictor.treinar("datatran_consolidado.json", n_jobs=-1)
+    predictor.exportar_modelo()
\ No newline at end of file
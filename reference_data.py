@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+import threading
+from types import MappingProxyType
+
+REFERENCE_DIR = os.path.dirname(os.path.abspath(__file__))
+UF_OPTIONS_FILE = 'uf_options.json'
+MUNICIPIOS_FILE = 'municipios_por_uf.json'
+CONDICOES_FILE = 'condicoes_metereologicas_options.json'
+
+
+def _codes(values):
+    return MappingProxyType({value: i for i, value in enumerate(values)})
+
+
+class ReferenceData:
+    """UFs, municípios e condições meteorológicas dos arquivos JSON, imutáveis
+
+    Os textos são internados e guardados em tuplas, frozensets e mapeamentos
+    somente leitura, então uma instância pode ser compartilhada entre módulos e
+    threads. Os códigos inteiros seguem a ordem dos arquivos: `local_codes`
+    indexa os pares (uf, município) na ordem de municipios_por_uf.json, a mesma
+    usada pelo cubo de risco.
+    """
+
+    def __init__(self, uf_options, municipios_por_uf, condicoes):
+        self.uf_options = tuple(sys.intern(uf) for uf in uf_options)
+        self.municipios_por_uf = MappingProxyType({
+            sys.intern(uf): tuple(sys.intern(municipio) for municipio in municipios)
+            for uf, municipios in municipios_por_uf.items()
+        })
+        self.municipio_sets = MappingProxyType({
+            uf: frozenset(municipios) for uf, municipios in self.municipios_por_uf.items()
+        })
+        self.condicoes = tuple(sys.intern(condicao) for condicao in condicoes)
+
+        self.uf_codes = _codes(self.uf_options)
+        self.condicao_codes = _codes(self.condicoes)
+        self.locais = tuple((uf, municipio) for uf, municipios in self.municipios_por_uf.items() for municipio in municipios)
+        self.local_codes = _codes(self.locais)
+
+        # Municípios de todas as UFs em sequência (ordem de uf_options), com o
+        # início e a quantidade de cada UF, para sortear municípios por índice
+        self.municipio_counts = tuple(len(self.municipios_por_uf.get(uf, ())) for uf in self.uf_options)
+        self.municipio_starts = tuple(sum(self.municipio_counts[:i]) for i in range(len(self.uf_options)))
+        self.municipios_flat = tuple(m for uf in self.uf_options for m in self.municipios_por_uf.get(uf, ()))
+
+        # JSON pronto para os scripts das páginas
+        self.municipios_json = json.dumps({uf: list(municipios) for uf, municipios in self.municipios_por_uf.items()})
+
+    def is_valid_location(self, uf, municipio):
+        return municipio in self.municipio_sets.get(uf, ())
+
+    @classmethod
+    def load(cls, directory=REFERENCE_DIR):
+        """Lê os três arquivos de `directory`"""
+        dados = []
+        for filename in (UF_OPTIONS_FILE, MUNICIPIOS_FILE, CONDICOES_FILE):
+            with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                dados.append(json.load(f))
+        return cls(*dados)
+
+
+_lock = threading.Lock()
+# Dados e a assinatura dos arquivos de onde foram lidos: a leitura sem o lock
+# só reaproveita dados cuja assinatura confere com a do disco
+_cached = (None, None)
+
+
+def _file_signature(directory):
+    """mtime e tamanho dos arquivos de referência, para detectar alterações"""
+    signature = []
+    for filename in (UF_OPTIONS_FILE, MUNICIPIOS_FILE, CONDICOES_FILE):
+        stat = os.stat(os.path.join(directory, filename))
+        signature.append((stat.st_mtime_ns, stat.st_size))
+    return directory, tuple(signature)
+
+
+def get_reference_data(directory=REFERENCE_DIR):
+    """Dados de referência compartilhados, relidos só quando algum arquivo mudar no disco"""
+    global _cached
+    signature = _file_signature(directory)
+    cached_signature, data = _cached
+    if signature == cached_signature:
+        return data
+    with _lock:
+        cached_signature, data = _cached
+        if signature != cached_signature:
+            data = ReferenceData.load(directory)
+            _cached = (signature, data)
+        return data
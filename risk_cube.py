@@ -0,0 +1,191 @@
+import numpy as np
+from datetime import date, datetime, timedelta
+import json
+import os
+import threading
+import time
+from reference_data import get_reference_data
+
+
+def _normalizar(assinatura):
+    """Assinatura no formato em que fica gravada em meta.json (tuplas viram listas)"""
+    return json.loads(json.dumps(assinatura))
+
+
+class RiskCube:
+    """Cubo pré-calculado de previsões (dia × local × hora × clima).
+
+    O cubo cobre `horizon_days` dias a partir de hoje e fica em disco como um
+    array NumPy mapeado em memória, indexado pelos códigos inteiros de
+    municipios_por_uf.json e condicoes_metereologicas_options.json. Uma consulta
+    de /predict vira um único acesso ao array.
+    """
+
+    def __init__(self, model_path='modelo_acidentes.pkl', directory='cubo_risco', horizon_days=7,
+                 tipo_acidente='COLISAO'):
+        self.model_path = model_path
+        self.directory = directory
+        self.horizon_days = horizon_days
+        self.tipo_acidente = tipo_acidente
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # Códigos fixados na criação: o cubo em disco é indexado por eles
+        reference = get_reference_data()
+        self.condicoes = reference.condicoes
+        self.locais = reference.locais
+        self.local_codes = reference.local_codes
+        self.condicao_codes = reference.condicao_codes
+
+        # Metadados (início, dias, modelo) e o cubo que eles descrevem; lookup lê
+        # os dois sem o lock, então o início nunca é aplicado ao cubo de outro refresh
+        self._estado = (None, None)
+        # Último par (metadados, assinatura) conferido em lookup
+        self._conferido = (None, None)
+        self._abrir()
+
+    @property
+    def shape_dia(self):
+        return (len(self.locais), 24, len(self.condicoes))
+
+    def _caminhos(self):
+        return os.path.join(self.directory, 'cubo.npy'), os.path.join(self.directory, 'meta.json')
+
+    def _caminho_historico(self):
+        """Histórico das features de lag salvo ao lado do modelo (ver AccidentPredictor.atualizar_historico)"""
+        return os.path.splitext(self.model_path)[0] + '.historico.npz'
+
+    def _assinatura_modelo(self):
+        """Identifica a versão do modelo e do histórico de lags pelo mtime e tamanho dos arquivos
+
+        O histórico muda os lags sem regravar o modelo, então também invalida os
+        dias já calculados.
+        """
+        caminhos = [self.model_path]
+        if os.path.exists(self._caminho_historico()):
+            caminhos.append(self._caminho_historico())
+        return [[stat.st_mtime_ns, stat.st_size] for stat in map(os.stat, caminhos)]
+
+    def _abrir(self):
+        """Abre o cubo salvo em disco, se existir"""
+        cubo_path, meta_path = self._caminhos()
+        if not (os.path.exists(cubo_path) and os.path.exists(meta_path)):
+            return
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self._estado = (meta, np.load(cubo_path, mmap_mode='r'))
+
+    def _do_modelo(self, meta, assinatura):
+        """Indica se o cubo de `meta` foi calculado pelo modelo com essa assinatura"""
+        conferido_meta, conferido_assinatura = self._conferido
+        if conferido_meta is meta and conferido_assinatura == assinatura:
+            return True
+        if meta['modelo'] != _normalizar(assinatura):
+            return False
+        self._conferido = (meta, assinatura)
+        return True
+
+    def lookup(self, data, horario, uf, municipio, condicao_meteorologica, assinatura=None):
+        """Previsão pré-calculada da consulta, ou None se ela estiver fora do cubo
+
+        Com `assinatura`, o cubo só responde se foi calculado pelo modelo que tem
+        essa assinatura (o mesmo valor passado para `refresh`).
+        """
+        meta, cubo = self._estado
+        if cubo is None:
+            return None
+        if assinatura is not None and not self._do_modelo(meta, assinatura):
+            return None
+
+        dia = (datetime.strptime(data, '%Y-%m-%d').date() - date.fromisoformat(meta['inicio'])).days
+        local = self.local_codes.get((uf, municipio))
+        condicao = self.condicao_codes.get(condicao_meteorologica)
+        hora = int(horario.split(':')[0])
+        if not 0 <= dia < meta['dias'] or local is None or condicao is None or not 0 <= hora < 24:
+            return None
+        return float(cubo[dia, local, hora, condicao])
+
+    def _pontuar_dia(self, predictor, dia):
+        """Pontua todas as combinações local × hora × clima de um dia com prever_lote"""
+        n_locais, n_horas, n_condicoes = self.shape_dia
+        n = n_locais * n_horas * n_condicoes
+        locais = np.repeat(np.arange(n_locais), n_horas * n_condicoes)
+        ufs = np.array([uf for uf, _ in self.locais], dtype=object)[locais]
+        municipios = np.array([municipio for _, municipio in self.locais], dtype=object)[locais]
+        horas = np.tile(np.repeat(np.arange(n_horas), n_condicoes), n_locais)
+        condicoes = np.tile(np.array(self.condicoes, dtype=object), n_locais * n_horas)
+
+        previsoes = predictor.prever_lote(
+            np.full(n, np.datetime64(dia, 'D')), horas, ufs, municipios, condicoes,
+            tipos_acidente=np.full(n, self.tipo_acidente, dtype=object)
+        )
+        return previsoes.reshape(self.shape_dia)
+
+    def refresh(self, predictor, hoje=None, assinatura=None):
+        """Atualiza o cubo para o horizonte a partir de `hoje`.
+
+        `assinatura` identifica a versão de `predictor` (por padrão, o mtime e o
+        tamanho dos arquivos do modelo e do histórico). Se o modelo não mudou, os dias já calculados são copiados do cubo atual e
+        só os dias novos do horizonte são pontuados. O cubo novo é gravado em um
+        arquivo temporário e trocado com os.replace, sem afetar leituras em andamento.
+        Devolve o número de dias pontuados.
+        """
+        with self._lock:
+            hoje = hoje or date.today()
+            assinatura = self._assinatura_modelo() if assinatura is None else _normalizar(assinatura)
+            meta, cubo = self._estado
+
+            deslocamento = None
+            if meta is not None and meta['modelo'] == assinatura:
+                deslocamento = (hoje - date.fromisoformat(meta['inicio'])).days
+                if deslocamento == 0 and meta['dias'] == self.horizon_days:
+                    return 0
+
+            os.makedirs(self.directory, exist_ok=True)
+            cubo_path, meta_path = self._caminhos()
+            novo = np.lib.format.open_memmap(
+                cubo_path + '.tmp', mode='w+', dtype=np.float32, shape=(self.horizon_days, *self.shape_dia)
+            )
+            pontuados = 0
+            for i in range(self.horizon_days):
+                antigo = None if deslocamento is None else i + deslocamento
+                if antigo is not None and 0 <= antigo < meta['dias']:
+                    novo[i] = cubo[antigo]
+                else:
+                    novo[i] = self._pontuar_dia(predictor, hoje + timedelta(days=i))
+                    pontuados += 1
+            novo.flush()
+            del novo
+
+            meta = {'inicio': hoje.isoformat(), 'dias': self.horizon_days, 'modelo': assinatura}
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(cubo_path + '.tmp', cubo_path)
+            os.replace(meta_path + '.tmp', meta_path)
+            self._estado = (meta, np.load(cubo_path, mmap_mode='r'))
+            return pontuados
+
+    def start(self, get_model, interval=300):
+        """Inicia a thread de fundo que mantém o cubo atualizado
+
+        `get_model` devolve o par (AccidentPredictor atual, assinatura) ou None;
+        a cada `interval` segundos o cubo é atualizado se o dia virou ou o modelo mudou.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def loop():
+            while True:
+                try:
+                    modelo = get_model()
+                    predictor, assinatura = modelo if modelo is not None else (None, None)
+                    if predictor is not None and getattr(predictor, 'treinado', False):
+                        pontuados = self.refresh(predictor, assinatura=assinatura)
+                        if pontuados:
+                            print(f"Cubo de risco atualizado: {pontuados} dia(s) pontuado(s)")
+                except Exception as e:
+                    print(f"Erro ao atualizar cubo de risco: {e}")
+                time.sleep(interval)
+
+        self._thread = threading.Thread(target=loop, name='risk-cube-refresh', daemon=True)
+        self._thread.start()
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dados_sinteticos import dados_brutos  # noqa: E402
+from preditor_ofc import AccidentPredictor  # noqa: E402
+
+# Poucas linhas: o modelo só precisa existir, não ser bom
+LINHAS_TREINO = 2_000
+
+
+@pytest.fixture(scope="session")
+def preditor_treinado(tmp_path_factory):
+    """Devolve um AccidentPredictor pequeno por configuração, treinado uma vez por sessão"""
+    modelos = {}
+
+    def treinar(**kwargs):
+        chave = tuple(sorted(kwargs.items()))
+        if chave not in modelos:
+            arquivo = tmp_path_factory.mktemp("dados") / "datatran.ndjson"
+            dados_brutos(LINHAS_TREINO).to_json(arquivo, orient="records", lines=True, force_ascii=False)
+            predictor = AccidentPredictor(**kwargs)
+            predictor.treinar(str(arquivo), cache=None)
+            modelos[chave] = predictor
+        return modelos[chave]
+
+    return treinar
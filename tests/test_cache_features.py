@@ -0,0 +1,37 @@
+import numpy as np
+
+from dados_sinteticos import dados_brutos
+from preditor_ofc import AccidentPredictor, COLUNAS_CATEGORICAS
+
+
+def _gravar(dados, arquivo):
+    dados.to_json(arquivo, orient="records", lines=True, force_ascii=False)
+    return str(arquivo)
+
+
+def _conferir_codigos(predictor, df, X):
+    for col in COLUNAS_CATEGORICAS:
+        esperado = predictor._indices_encoders[col].get_indexer(df[col])
+        np.testing.assert_array_equal(X[f"{col}_enc"].to_numpy(), esperado)
+
+
+def test_cache_usa_os_encoders_de_quem_le(tmp_path):
+    """Uma entrada gravada com os encoders de outro modelo dá os códigos dos encoders de quem lê"""
+    base = _gravar(dados_brutos(2_000, seed=1), tmp_path / "base.ndjson")
+    outros = dados_brutos(2_000, seed=2)
+    outros["municipio"] = "AAA " + outros["municipio"]
+    comparacao = _gravar(outros, tmp_path / "comparacao.ndjson")
+    cache = str(tmp_path / "cache")
+
+    # A entrada de `comparacao` é gravada com os encoders ajustados em `base`
+    escritor = AccidentPredictor()
+    escritor._carregar_features(base, cache=cache)
+    df, X, _ = escritor._carregar_features(comparacao, cache=cache)
+    _conferir_codigos(escritor, df, X)
+
+    leitor = AccidentPredictor()
+    df, X, _ = leitor._carregar_features(comparacao, cache=cache)
+    _conferir_codigos(leitor, df, X)
+    _, sem_cache, _ = AccidentPredictor()._carregar_features(comparacao, cache=None)
+    assert X.columns.tolist() == sem_cache.columns.tolist()
+    assert (X.dtypes == sem_cache.dtypes).all()
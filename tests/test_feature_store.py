@@ -0,0 +1,49 @@
+import copy
+
+import numpy as np
+
+from dados_sinteticos import dados_brutos
+from feature_store import FeatureStore, NOMES_FEATURES
+from preditor_ofc import AccidentPredictor
+
+
+def test_historico_igual_a_shift_rolling():
+    """Lags e janelas do histórico seguem shift/rolling do treino, mesmo montado em partes"""
+    # Linhas suficientes para ter todos os dias: o shift por linha é o shift por dia
+    df = AccidentPredictor()._processar_dados(dados_brutos(30_000))
+    # Definição do treino (_criar_features), em float64
+    anterior = df["acidentes"].shift(1)
+    esperado = {f"lag_{lag}": df["acidentes"].shift(lag) for lag in [1, 2, 7, 14]}
+    for w in [7, 14, 28]:
+        esperado[f"media_{w}"] = anterior.rolling(w, min_periods=1).mean()
+        esperado[f"std_{w}"] = anterior.rolling(w, min_periods=1).std()
+
+    metade = len(df) // 2
+    historico = FeatureStore().adicionar(df["data"][:metade], df["acidentes"][:metade])
+    historico.adicionar(df["data"][metade:], df["acidentes"][metade:])
+    obtido = historico.features(df["data"])
+    assert sorted(obtido) == sorted(esperado)
+    for nome, valores in obtido.items():
+        np.testing.assert_allclose(valores, esperado[nome].fillna(0).to_numpy(), rtol=0, atol=1e-9, err_msg=nome)
+
+
+def test_historico_vazio_devolve_zeros():
+    """Sem regiões nem dias, todas as features valem 0"""
+    datas = np.array(["2024-01-01", "2024-06-30"], dtype="datetime64[D]")
+    for historico in (FeatureStore(), FeatureStore().adicionar(datas[:0], [])):
+        obtido = historico.features(datas, regioes=np.array(["SP", "RJ"], dtype=object), dtype=np.float32)
+        assert list(obtido) == NOMES_FEATURES
+        for valores in obtido.values():
+            np.testing.assert_array_equal(valores, np.zeros(2, dtype=np.float32))
+
+
+def test_prever_com_historico_sem_registros(preditor_treinado):
+    """Atualizar o histórico só com registros descartados não quebra a previsão"""
+    predictor = copy.copy(preditor_treinado())
+    predictor.historico = None
+    antigos = dados_brutos(100)
+    antigos["data_inversa"] = "01/01/2018"
+    assert predictor.atualizar_historico(antigos) == 0
+
+    previsoes = predictor.prever(dados_brutos(20))
+    assert len(previsoes) > 0
@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from dados_sinteticos import consultas
+
+CONFIGURACOES = [
+    {"feriados_estaduais": False, "granularidade": "dia"},
+    {"feriados_estaduais": True, "granularidade": "dia"},
+    {"feriados_estaduais": False, "granularidade": "uf"},
+    {"feriados_estaduais": False, "granularidade": "municipio"},
+]
+
+
+@pytest.mark.parametrize("configuracao", CONFIGURACOES, ids=lambda c: f"{c['granularidade']}-{c['feriados_estaduais']}")
+def test_prever_rapido_igual_a_prever(preditor_treinado, configuracao):
+    """prever_rapido dá o mesmo resultado de prever com um DataFrame de uma linha"""
+    predictor = preditor_treinado(**configuracao)
+    for data, hora, uf, municipio, condicao, tipo in consultas(50):
+        linha = pd.DataFrame({
+            "data_inversa": [data.strftime("%d/%m/%Y")],
+            "horario": [f"{hora:02d}:00:00"],
+            "uf": [uf],
+            "municipio": [municipio],
+            "tipo_acidente": [tipo],
+            "condicao_metereologica": [condicao],
+        })
+        esperado = predictor.prever(linha)["previsoes_acidentes"].iloc[0]
+        assert predictor.prever_rapido(data, hora, uf, municipio, condicao, tipo) == esperado
@@ -0,0 +1,37 @@
+import numpy as np
+
+from dados_sinteticos import consultas
+from tree_inference import FlatForest
+
+
+def _matriz(predictor, n=2_000):
+    X = predictor._matriz_lote(*(np.asarray(c, dtype=object) for c in zip(*consultas(n))))
+    X[::97, 10] = np.nan  # hora_media ausente em algumas linhas, para exercitar os valores ausentes
+    return X
+
+
+def test_floresta_igual_ao_booster(preditor_treinado):
+    """A floresta achatada soma as mesmas folhas que o booster do LightGBM"""
+    predictor = preditor_treinado()
+    booster = predictor._booster()
+    X = _matriz(predictor)
+    np.testing.assert_allclose(FlatForest.from_booster(booster).predict(X), booster.predict(X), rtol=0, atol=1e-9)
+
+
+def test_floresta_em_blocos(preditor_treinado):
+    """Dividir o lote em blocos não muda o resultado"""
+    floresta = FlatForest.from_booster(preditor_treinado()._booster())
+    X = _matriz(preditor_treinado())
+    np.testing.assert_array_equal(floresta.predict(X, tamanho_bloco=333), floresta.predict(X))
+
+
+def test_backend_numpy_no_prever_rapido(preditor_treinado):
+    """usar_arvores_compiladas mantém as previsões de prever_rapido"""
+    predictor = preditor_treinado()
+    amostra = list(consultas(50))
+    esperado = [predictor.prever_rapido(*c) for c in amostra]
+    predictor.usar_arvores_compiladas()
+    try:
+        assert [predictor.prever_rapido(*c) for c in amostra] == esperado
+    finally:
+        predictor.usar_arvores_compiladas(False)
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from dados_sinteticos import dados_brutos
+from preditor_ofc import AccidentPredictor
+
+
+def test_retreino_por_drift_usa_os_encoders_novos(tmp_path, monkeypatch):
+    """No retreino completo, as features saem dos encoders refeitos, os mesmos da previsão"""
+    dados = dados_brutos(3_000)
+    datas = pd.to_datetime(dados["data_inversa"], format="%d/%m/%Y")
+    novos = datas > datas.max() - pd.Timedelta(days=30)
+    # Municípios novos nos dias novos, ordenados antes dos antigos: todos os códigos mudam
+    dados.loc[novos, "municipio"] = "AAA NOVO"
+    base, completo = tmp_path / "base.ndjson", tmp_path / "completo.ndjson"
+    dados[~novos].to_json(base, orient="records", lines=True, force_ascii=False)
+    dados.to_json(completo, orient="records", lines=True, force_ascii=False)
+    cache = str(tmp_path / "cache")
+
+    predictor = AccidentPredictor()
+    predictor.treinar(str(base), cache=cache)
+
+    treinos = []
+    treinar_features = predictor._treinar_features
+    monkeypatch.setattr(predictor, "_treinar_features",
+                        lambda df, X, y, **kwargs: treinos.append((df, X)) or treinar_features(df, X, y, **kwargs))
+    relatorio = predictor.treinar_incremental(str(completo), limiar_drift=-1, cache=cache)
+
+    assert relatorio["estrategia"] == "completo"
+    df, X = treinos[-1]
+    for col in ["uf", "municipio", "tipo_acidente", "clima"]:
+        esperado = predictor._indices_encoders[col].get_indexer(df[col])
+        np.testing.assert_array_equal(X[f"{col}_enc"].to_numpy(), esperado)
@@ -0,0 +1,111 @@
+import numpy as np
+
+# Mesmo limiar que o LightGBM usa para tratar um valor como zero (kZeroThreshold)
+ZERO_THRESHOLD = 1e-35
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+_MISSING_TYPES = {'None': MISSING_NONE, 'Zero': MISSING_ZERO, 'NaN': MISSING_NAN}
+
+
+class FlatForest:
+    """Árvores de um booster do LightGBM achatadas em arrays NumPy.
+
+    Cada nó de todas as árvores ocupa uma posição dos arrays (feature, limiar,
+    filhos, valor). A previsão de um lote percorre todas as árvores ao mesmo
+    tempo, um nível por iteração, sem chamadas ao LightGBM. Folhas apontam para
+    si mesmas, então linhas que chegam cedo a uma folha ficam paradas nela.
+    Só splits numéricos são suportados, que é o que o modelo de acidentes usa.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, missing_type, value, roots, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.missing_type = missing_type
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        # children[nó] = (filho da direita, filho da esquerda), indexado pelo resultado do split
+        self.children = np.stack([right, left], axis=1)
+        self._trata_ausentes = bool((missing_type != MISSING_NONE).any())
+
+    @classmethod
+    def from_booster(cls, booster):
+        """Constrói a floresta a partir de `booster.dump_model()`"""
+        modelo = booster.dump_model()
+        if modelo['num_tree_per_iteration'] != 1 or modelo['average_output']:
+            raise NotImplementedError("Apenas modelos de regressão com boosting são suportados.")
+
+        nos = {nome: [] for nome in ('feature', 'threshold', 'left', 'right', 'default_left', 'missing_type', 'value')}
+        roots = []
+        max_depth = 0
+
+        def adicionar(no, profundidade):
+            nonlocal max_depth
+            indice = len(nos['value'])
+            for valores in nos.values():
+                valores.append(0)
+            if 'leaf_value' in no:
+                max_depth = max(max_depth, profundidade)
+                nos['left'][indice] = nos['right'][indice] = indice
+                nos['value'][indice] = no['leaf_value']
+                return indice
+            if no['decision_type'] != '<=':
+                raise NotImplementedError("Splits categóricos não são suportados.")
+            nos['feature'][indice] = no['split_feature']
+            nos['threshold'][indice] = no['threshold']
+            nos['default_left'][indice] = no['default_left']
+            nos['missing_type'][indice] = _MISSING_TYPES[no['missing_type']]
+            nos['left'][indice] = adicionar(no['left_child'], profundidade + 1)
+            nos['right'][indice] = adicionar(no['right_child'], profundidade + 1)
+            return indice
+
+        for arvore in modelo['tree_info']:
+            roots.append(adicionar(arvore['tree_structure'], 0))
+
+        return cls(
+            feature=np.asarray(nos['feature'], dtype=np.intp),
+            threshold=np.asarray(nos['threshold'], dtype=np.float64),
+            left=np.asarray(nos['left'], dtype=np.intp),
+            right=np.asarray(nos['right'], dtype=np.intp),
+            default_left=np.asarray(nos['default_left'], dtype=bool),
+            missing_type=np.asarray(nos['missing_type'], dtype=np.int8),
+            value=np.asarray(nos['value'], dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth
+        )
+
+    def _predict_bloco(self, X):
+        n_linhas, n_features = X.shape
+        if not self._trata_ausentes:
+            # Nenhum split trata ausentes: como no LightGBM, NaN vira 0 e vale só o limiar
+            X = np.nan_to_num(X, nan=0.0)
+        valores = X.ravel()
+        base = (np.arange(n_linhas) * n_features)[:, None]
+        nos = np.broadcast_to(self.roots, (n_linhas, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = valores[base + self.feature[nos]]
+            if self._trata_ausentes:
+                missing = self.missing_type[nos]
+                nan = np.isnan(x)
+                x = np.where(nan & (missing != MISSING_NAN), 0.0, x)
+                ausente = ((missing == MISSING_ZERO) & (np.abs(x) <= ZERO_THRESHOLD)) | ((missing == MISSING_NAN) & nan)
+                esquerda = np.where(ausente, self.default_left[nos], x <= self.threshold[nos])
+            else:
+                esquerda = x <= self.threshold[nos]
+            proximos = self.children[nos, esquerda.view(np.uint8)]
+            if np.array_equal(proximos, nos):
+                # Todas as linhas já chegaram a uma folha em todas as árvores
+                break
+            nos = proximos
+        return self.value[nos].sum(axis=1)
+
+    def predict(self, X, tamanho_bloco=10_000):
+        """Soma das folhas de todas as árvores para cada linha de X (raw score)"""
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) <= tamanho_bloco:
+            return self._predict_bloco(X)
+        return np.concatenate([
+            self._predict_bloco(X[inicio:inicio + tamanho_bloco]) for inicio in range(0, len(X), tamanho_bloco)
+        ])